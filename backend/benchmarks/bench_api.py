@@ -0,0 +1,358 @@
+"""End-to-end load test of the five /api/* endpoints against a fake LLM backend.
+
+Each virtual user runs whole cases through the pipeline (FIR -> questionnaire ->
+charge sheet -> verdict -> fairness, chained by case_id), `--concurrency` users at a
+time. Reports p50/p95/p99 latency and requests per second per endpoint, RSS per
+worker, and how each endpoint's time splits between retrieval, LLM calls and
+serialization. Save runs with --output and diff them with --compare:
+
+    python benchmarks/bench_api.py --cases 40 --concurrency 8 --output before.json
+    python benchmarks/bench_api.py --cases 40 --concurrency 8 --compare before.json
+
+By default the app runs in-process (LLM_BACKEND=fake, no rate limits, no caches).
+With --url the load goes to a running server instead, e.g. several uvicorn workers
+started with LLM_BACKEND=fake; RSS is then sampled from each worker's /api/stats.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+
+from models import (
+    ChargeSheetRequest,
+    FairnessRequest,
+    FIRRequest,
+    QuestionnaireRequest,
+    VerdictRequest,
+)
+
+FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "precheck_cases.json")
+
+ENDPOINTS = {
+    "/api/generate_fir": FIRRequest,
+    "/api/generate_questionnaire": QuestionnaireRequest,
+    "/api/generate_charge_sheet": ChargeSheetRequest,
+    "/api/predict_verdict": VerdictRequest,
+    "/api/analyze_fairness": FairnessRequest,
+}
+
+# Span histograms whose per-endpoint sums make up the time breakdown
+SPAN_SUMS = {
+    "llm": "lawgorithm_llm_request_seconds_sum",
+    "retrieval": "lawgorithm_retrieval_seconds_sum",
+}
+SAMPLE = re.compile(r"^(\w+)(?:\{(.*)\})? (\S+)$")
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, round(p / 100 * len(ordered) + 0.5))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def scrape_span_sums(text):
+    """{(span kind, endpoint): seconds} from a /metrics page"""
+    wanted = {name: kind for kind, name in SPAN_SUMS.items()}
+    sums = defaultdict(float)
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match and match.group(1) in wanted:
+            labels = dict(LABEL.findall(match.group(2) or ""))
+            sums[wanted[match.group(1)], labels.get("endpoint")] += float(
+                match.group(3)
+            )
+    return sums
+
+
+def serialization_ms(model, payload, body, rounds=50):
+    """Mean time to validate a request body and encode/decode its JSON response"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        model.model_validate(payload)
+        json.loads(json.dumps(body))
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def fir_payload(text, n):
+    return {
+        "case_description": f"{text} (case {n})",
+        "complainant": {"name": f"Complainant {n}", "address": "Hyderabad"},
+        "accused": {"name": "Unknown person(s)"},
+        "police_station": "Banjara Hills",
+        "officer_name": "S. Rao",
+        "officer_rank": "Sub-Inspector",
+    }
+
+
+def answers(questionnaire, side):
+    questions = questionnaire.get(f"{side}_questions", [])
+    replies = questionnaire.get(f"{side}_simulated_answers", [])
+    return dict(zip(questions, replies))
+
+
+class LoadTest:
+    def __init__(self, client):
+        self.client = client
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.samples = {}  # endpoint -> (request payload, response body)
+
+    async def call(self, endpoint, payload):
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(endpoint, json=payload)
+            body = response.json() if response.status_code == 200 else None
+        except httpx.HTTPError:
+            body = None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if body is None:
+            self.errors[endpoint] += 1
+        else:
+            self.samples.setdefault(endpoint, (payload, body))
+        return body
+
+    async def run_case(self, payload):
+        fir = await self.call("/api/generate_fir", payload)
+        if not fir:
+            return
+        case_id = fir["case_id"]
+        questionnaire = await self.call(
+            "/api/generate_questionnaire", {"case_id": case_id}
+        )
+        if not questionnaire:
+            return
+        charge_sheet = await self.call(
+            "/api/generate_charge_sheet",
+            {
+                "case_id": case_id,
+                "plaintiff_answers": answers(questionnaire, "plaintiff"),
+                "defendant_answers": answers(questionnaire, "defendant"),
+            },
+        )
+        if not charge_sheet or not await self.call(
+            "/api/predict_verdict", {"case_id": case_id}
+        ):
+            return
+        await self.call("/api/analyze_fairness", {"case_id": case_id})
+
+    async def run(self, payloads, concurrency):
+        queue = iter(payloads)
+
+        async def user():
+            for payload in queue:
+                await self.run_case(payload)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def worker_memory(client, samples):
+    """Memory per worker pid, from repeated /api/stats calls (they land on any worker)"""
+    workers = {}
+    for _ in range(samples):
+        try:
+            process = (await client.get("/api/stats")).json()["process"]
+        except (httpx.HTTPError, KeyError, ValueError):
+            continue
+        workers[str(process["pid"])] = {
+            "rss_mb": round((process["rss_bytes"] or 0) / 2**20, 1),
+            "peak_rss_mb": round((process["peak_rss_bytes"] or 0) / 2**20, 1),
+        }
+    return workers
+
+
+async def wait_until_ready(client, timeout=300):
+    """Poll /ready until the server has warmed up its retrieval stack"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError("server did not become ready")
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(client, args, started):
+    await wait_until_ready(client)
+    ready_s = time.perf_counter() - started
+    ready = (await client.get("/ready")).json()
+
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        texts = [c["text"] for c in json.load(f) if c["label"] == "VALID"]
+    # Numbered descriptions keep every case distinct (no cache or session reuse)
+    numbered = (fir_payload(t, n) for n, t in enumerate(itertools.cycle(texts)))
+    warmup = [next(numbered) for _ in range(args.warmup)]
+    payloads = [next(numbered) for _ in range(args.cases)]
+
+    await LoadTest(client).run(warmup, min(args.concurrency, len(warmup) or 1))
+
+    before = scrape_span_sums((await client.get("/metrics")).text)
+    load = LoadTest(client)
+    start = time.perf_counter()
+    await load.run(payloads, args.concurrency)
+    duration = time.perf_counter() - start
+    after = scrape_span_sums((await client.get("/metrics")).text)
+
+    endpoints = {}
+    for endpoint, model in ENDPOINTS.items():
+        latencies = load.latencies.get(endpoint)
+        if not latencies:
+            continue
+        count = len(latencies)
+        ms = [s * 1000 for s in latencies]
+        breakdown = {
+            kind: round(
+                1000
+                * (after[kind, endpoint] - before.get((kind, endpoint), 0.0))
+                / count,
+                1,
+            )
+            for kind in SPAN_SUMS
+        }
+        if endpoint in load.samples:
+            breakdown["serialization"] = round(
+                serialization_ms(model, *load.samples[endpoint]), 3
+            )
+        mean = sum(ms) / count
+        # Spans run concurrently inside a request, so the parts can exceed the total
+        breakdown["other"] = round(max(0.0, mean - sum(breakdown.values())), 1)
+        endpoints[endpoint] = {
+            "requests": count,
+            "errors": load.errors[endpoint],
+            "rps": round(count / duration, 2),
+            "mean_ms": round(mean, 1),
+            "p50_ms": round(percentile(ms, 50), 1),
+            "p95_ms": round(percentile(ms, 95), 1),
+            "p99_ms": round(percentile(ms, 99), 1),
+            "breakdown_ms": breakdown,
+        }
+
+    requests = sum(e["requests"] for e in endpoints.values())
+    return {
+        "commit": git_commit(),
+        "config": {
+            "target": args.url or "in-process",
+            "cases": args.cases,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+            "llm_backend": os.getenv("LLM_BACKEND") if not args.url else None,
+        },
+        "overall": {
+            "requests": requests,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "duration_s": round(duration, 2),
+            "rps": round(requests / duration, 2),
+            "cases_per_s": round(args.cases / duration, 3),
+        },
+        "startup": {
+            # In-process: import + startup until /ready; with --url: until /ready
+            "ready_s": round(ready_s, 2),
+            "warmup_s": ready.get("warmup_seconds"),
+            "semantic_search": ready.get("semantic_search"),
+        },
+        "endpoints": endpoints,
+        "workers": await worker_memory(client, args.memory_samples),
+    }
+
+
+async def run(args):
+    started = time.perf_counter()
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            return await benchmark(client, args, started)
+
+    import main
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            return await benchmark(client, args, started)
+
+
+def compare(result, baseline):
+    """Print p50/p95/p99 changes against an earlier run"""
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    for endpoint, now in result["endpoints"].items():
+        then = baseline.get("endpoints", {}).get(endpoint)
+        if not then:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            delta = (now[key] - then[key]) / then[key] * 100 if then[key] else 0.0
+            changes.append(
+                f"{key[:-3]} {then[key]:.0f}->{now[key]:.0f}ms ({delta:+.1f}%)"
+            )
+        print(f"  {endpoint:<30} " + ", ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20, help="cases to run end to end")
+    parser.add_argument("--concurrency", type=int, default=4, help="virtual users")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured cases first")
+    parser.add_argument(
+        "--llm-latency",
+        default="lognormal:800,0.5",
+        help='fake LLM latency, e.g. "fixed:0" to isolate server overhead',
+    )
+    parser.add_argument("--url", help="load a running server instead of in-process")
+    parser.add_argument(
+        "--memory-samples", type=int, default=20, help="/api/stats calls for RSS"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="earlier --output file to diff against")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Offline, unthrottled and uncached, so every request does the full work
+        scratch = tempfile.mkdtemp(prefix="bench_api_")
+        os.environ.update(
+            LLM_BACKEND=os.getenv("LLM_BACKEND", "fake"),
+            LLM_FAKE_LATENCY=args.llm_latency,
+            LLM_RPM="0",
+            LLM_TPM="0",
+            LLM_CACHE="off",
+            SEMANTIC_CACHE="off",
+            JOBS_DB=os.path.join(scratch, "jobs.sqlite3"),
+            CASE_SESSIONS_DB=os.path.join(scratch, "case_sessions.sqlite3"),
+        )
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
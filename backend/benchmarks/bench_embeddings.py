@@ -0,0 +1,144 @@
+"""Compare the float sentence-transformers embeddings with the ONNX int8 export.
+
+Encodes the laws corpus (the texts build_laws_chromadb.py indexes) with both backends
+and reports:
+
+- parity: cosine similarity between the float and int8 vector of every section, and
+  how many of the float model's top-10 sections the int8 model also retrieves for the
+  case descriptions in fixtures/precheck_cases.json;
+- encode throughput (texts per second) at batch size 1 and --batch-size;
+- import time of each stack, measured in a fresh interpreter.
+
+    python export_onnx_embeddings.py
+    python benchmarks/bench_embeddings.py [--backend onnx] [--output results.json]
+
+Exits with status 1 when the mean cosine falls below --min-cosine.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from build_laws_chromadb import load_laws_data
+from embeddings import ONNX_INT8, SENTENCE_TRANSFORMERS, embedding_function
+
+FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "precheck_cases.json")
+
+IMPORTS = {
+    SENTENCE_TRANSFORMERS: "import sentence_transformers",
+    "onnx": "import onnxruntime, tokenizers",
+}
+
+
+def import_seconds(statement):
+    """Seconds to run `statement` in a fresh interpreter (median of 3)"""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    runs = [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, check=True
+            ).stdout
+        )
+        for _ in range(3)
+    ]
+    return sorted(runs)[1]
+
+
+def encode(function, texts, batch_size):
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(function(texts[i : i + batch_size]))
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def throughput(function, texts, batch_size):
+    start = time.perf_counter()
+    encode(function, texts, batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def top_k(corpus, queries, k):
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+def run(args):
+    documents, _, _ = load_laws_data(os.path.join(BACKEND_DIR, "laws_json"))
+    if args.limit:
+        documents = documents[: args.limit]
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        queries = [c["text"] for c in json.load(f) if c["label"] == "VALID"]
+
+    reference = embedding_function(SENTENCE_TRANSFORMERS)
+    candidate = embedding_function(args.backend)
+    # First calls pay one-off initialisation; keep them out of the timings
+    reference(["warmup"])
+    candidate(["warmup"])
+
+    ref_corpus = encode(reference, documents, args.batch_size)
+    cand_corpus = encode(candidate, documents, args.batch_size)
+    cosines = np.sum(ref_corpus * cand_corpus, axis=1)
+
+    ref_hits = top_k(ref_corpus, encode(reference, queries, args.batch_size), 10)
+    cand_hits = top_k(cand_corpus, encode(candidate, queries, args.batch_size), 10)
+    overlap = [len(set(a) & set(b)) / 10 for a, b in zip(ref_hits, cand_hits)]
+
+    sample = documents[: args.single_texts]
+    summary = {
+        "backend": args.backend,
+        "documents": len(documents),
+        "parity": {
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            "cosine_p01": round(float(np.percentile(cosines, 1)), 5),
+            "share_above_0.99": round(float(np.mean(cosines >= 0.99)), 4),
+            "top10_overlap_mean": round(float(np.mean(overlap)), 4),
+        },
+        "texts_per_second": {
+            SENTENCE_TRANSFORMERS: {
+                "batch_1": round(throughput(reference, sample, 1), 1),
+                f"batch_{args.batch_size}": round(
+                    throughput(reference, documents, args.batch_size), 1
+                ),
+            },
+            args.backend: {
+                "batch_1": round(throughput(candidate, sample, 1), 1),
+                f"batch_{args.batch_size}": round(
+                    throughput(candidate, documents, args.batch_size), 1
+                ),
+            },
+        },
+        "import_seconds": {
+            name: round(import_seconds(statement), 2)
+            for name, statement in IMPORTS.items()
+        },
+    }
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return summary["parity"]["cosine_mean"] >= args.min_cosine
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=ONNX_INT8, help="onnx or onnx-int8")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument(
+        "--single-texts", type=int, default=200, help="texts for the batch-1 timing"
+    )
+    parser.add_argument("--limit", type=int, help="only the first N law sections")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args) else 1)
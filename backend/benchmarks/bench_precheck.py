@@ -0,0 +1,122 @@
+"""Benchmark the local FIR pre-check against the LLM pre-check.
+
+Runs every description in fixtures/precheck_cases.json through the local classifier
+(precheck.py + max corpus similarity) and, when GROQ_API_KEY is set, through the LLM
+pre-check as well. Reports the share of inputs settled locally, agreement with the LLM
+on those, and the latency saved per FIR.
+
+    python benchmarks/bench_precheck.py [--no-llm] [--model M] [--output results.json]
+
+The LLM reference is the large-tier model (the evaluator the local check replaced),
+not the small model the precheck stage is routed to; --model picks another.
+
+With --no-llm (or no API key) the fixture labels stand in for the LLM's answers.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+os.environ.setdefault("LLM_CACHE", "off")  # measure real round trips
+load_dotenv(os.path.join(BACKEND_DIR, ".env"))
+
+from precheck import AMBIGUOUS, classify_description
+from utils import max_corpus_similarity
+
+FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "precheck_cases.json")
+
+
+async def llm_precheck(text, model=None):
+    # Imported only when the LLM is used: main builds the Groq client at import,
+    # which fails without GROQ_API_KEY
+    import main
+
+    main.PRECHECK_MODE = "llm"
+    model = model or main.model_router.models["large"]
+    return await main.precheck_description(text, model=model)
+
+
+async def run(use_llm, output, model=None):
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    rows = []
+    for case in cases:
+        start = time.perf_counter()
+        similarity = max_corpus_similarity(case["text"])
+        local = classify_description(case["text"], similarity)
+        local_ms = (time.perf_counter() - start) * 1000
+
+        llm_ms = None
+        reference = case["label"]
+        if use_llm:
+            start = time.perf_counter()
+            reference = await llm_precheck(case["text"], model)
+            llm_ms = (time.perf_counter() - start) * 1000
+
+        rows.append(
+            {
+                "text": case["text"],
+                "label": case["label"],
+                "similarity": similarity,
+                "local": local,
+                "reference": reference,
+                "local_ms": local_ms,
+                "llm_ms": llm_ms,
+            }
+        )
+
+    decided = [r for r in rows if r["local"] != AMBIGUOUS]
+    agreed = [r for r in decided if r["local"] == r["reference"]]
+    local_ms = [r["local_ms"] for r in rows]
+    llm_ms = [r["llm_ms"] for r in rows if r["llm_ms"] is not None]
+
+    summary = {
+        "cases": len(rows),
+        "reference": f"llm ({model or 'large tier'})" if use_llm else "fixture labels",
+        "decided_locally": len(decided),
+        "decided_share": round(len(decided) / len(rows), 4),
+        "agreement_on_decided": (
+            round(len(agreed) / len(decided), 4) if decided else None
+        ),
+        "local_ms_p50": round(statistics.median(local_ms), 2),
+        "local_ms_max": round(max(local_ms), 2),
+        "llm_ms_p50": round(statistics.median(llm_ms), 2) if llm_ms else None,
+    }
+    if llm_ms:
+        # Every input pays the local check; decided ones skip the LLM call entirely
+        summary["expected_ms_saved_per_fir"] = round(
+            summary["decided_share"] * statistics.mean(llm_ms)
+            - statistics.mean(local_ms),
+            2,
+        )
+
+    print(json.dumps(summary, indent=2))
+    for r in rows:
+        if r["local"] != AMBIGUOUS and r["local"] != r["reference"]:
+            print(
+                f"DISAGREE local={r['local']} reference={r['reference']}: {r['text']}"
+            )
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "cases": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-llm", action="store_true", help="compare to labels only")
+    parser.add_argument("--model", help="LLM reference model (default: large tier)")
+    parser.add_argument("--output", help="write per-case results to this JSON file")
+    args = parser.parse_args()
+
+    use_llm = bool(os.getenv("GROQ_API_KEY")) and not args.no_llm
+    asyncio.run(run(use_llm, args.output, args.model))
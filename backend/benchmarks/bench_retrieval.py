@@ -0,0 +1,137 @@
+"""Recall and latency of laws retrieval: vector only, BM25 only, and hybrid RRF.
+
+Runs the case descriptions in fixtures/retrieval_cases.json, each labelled with the
+sections a lawyer would cite, through:
+
+- vector: the ChromaDB cosine search alone (HYBRID_RETRIEVAL=off);
+- bm25: the lexical index over laws_json alone;
+- hybrid: both, fused by reciprocal rank (HYBRID_RETRIEVAL=on).
+
+Sections cited in a query are placed first in the vector and hybrid modes. Reports
+recall@k (share of the labelled sections in the top k, averaged over cases), MRR,
+and per-query latency with the retrieval caches off. The vector mode needs chromadb
+and a built laws_chromadb; without them, hybrid is BM25 plus citations.
+
+    python benchmarks/bench_retrieval.py [--k 5,10] [--weight-bm25 1.5] [--output r.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+# Every query must hit the model and the index, not the LRU caches
+os.environ["RETRIEVAL_CACHE"] = "off"
+
+import utils
+from lexical_index import section_key
+
+FIXTURES = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "retrieval_cases.json")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def bm25_search(query, limit):
+    index = utils.get_law_index()
+    return [
+        section_key(index.sections[doc].law, index.sections[doc].section)
+        for doc, _ in index.search(query, limit)
+    ]
+
+
+def chroma_search(hybrid):
+    def search(query, limit):
+        utils.HYBRID_RETRIEVAL = hybrid
+        hits = utils.search_sections(query, limit) or []
+        return [section_key(hit.law, hit.section) for hit in hits]
+
+    return search
+
+
+def evaluate(search, cases, ks, repeat):
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    for case in cases:
+        relevant = {section_key(*label.split()) for label in case["relevant"]}
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ranked = search(case["text"], max(ks))
+            latencies.append((time.perf_counter() - start) * 1000)
+        for k in ks:
+            recalls[k].append(len(relevant & set(ranked[:k])) / len(relevant))
+        first = next((i for i, key in enumerate(ranked, 1) if key in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+
+    return {
+        **{f"recall@{k}": round(statistics.mean(recalls[k]), 4) for k in ks},
+        "mrr": round(statistics.mean(reciprocal_ranks), 4),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "mean": round(statistics.mean(latencies), 3),
+        },
+    }
+
+
+def run(args):
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+    ks = sorted(int(k) for k in args.k.split(","))
+    utils.RRF_K = args.rrf_k
+    utils.RRF_WEIGHT_VECTOR = args.weight_vector
+    utils.RRF_WEIGHT_BM25 = args.weight_bm25
+
+    start = time.perf_counter()
+    index = utils.get_law_index()
+    load_seconds = time.perf_counter() - start
+
+    modes = {"bm25": bm25_search, "hybrid": chroma_search(True)}
+    vector_db = utils.HAS_SEMANTIC and utils.load_semantic_model()[1] is not None
+    if vector_db:
+        utils.embed_query("warmup")  # one-off model initialisation
+        modes = {"vector": chroma_search(False), **modes}
+    else:
+        print(
+            "Vector DB unavailable (chromadb or laws_chromadb missing): no vector mode"
+        )
+
+    summary = {
+        "cases": len(cases),
+        "vector_db": vector_db,
+        "rrf": {
+            "k": args.rrf_k,
+            "weight_vector": args.weight_vector,
+            "weight_bm25": args.weight_bm25,
+        },
+        "lexical_index": {**index.snapshot(), "load_seconds": round(load_seconds, 3)},
+        "modes": {
+            name: evaluate(search, cases, ks, args.repeat)
+            for name, search in modes.items()
+        },
+    }
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", default="5,10", help="comma-separated cut-offs")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="timed runs of every query"
+    )
+    parser.add_argument("--rrf-k", type=float, default=utils.RRF_K)
+    parser.add_argument("--weight-vector", type=float, default=utils.RRF_WEIGHT_VECTOR)
+    parser.add_argument("--weight-bm25", type=float, default=utils.RRF_WEIGHT_BM25)
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    run(parser.parse_args())
@@ -0,0 +1,170 @@
+"""Latency and recall of the NumPy exact-search stores against ChromaDB.
+
+Loads a collection (laws_chromadb / cases_chromadb) into NumpyVectorStore as float32
+and float16, exports it and memory-maps the export (MappedVectorStore), and times
+top-k queries against each and against ChromaDB's HNSW index: one query per call, and
+all queries in a single batched call. Recall@k is measured against exact float32
+search. Queries are corpus vectors with Gaussian noise added, so each has a realistic
+neighbourhood.
+
+Without chromadb or a built DB, --synthetic N benchmarks the NumPy stores alone on N
+random vectors.
+
+    python benchmarks/bench_vector_store.py [--collection cases] [--k 10]
+    python benchmarks/bench_vector_store.py --synthetic 90000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from vector_store import MappedVectorStore, NumpyVectorStore, normalize
+
+COLLECTIONS = {
+    "laws": ("laws_chromadb", "indian_laws"),
+    "cases": ("cases_chromadb", "historical_cases"),
+}
+DIMENSIONS = 384
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def open_collection(name):
+    import chromadb
+
+    path, collection = COLLECTIONS[name]
+    client = chromadb.PersistentClient(path=os.path.join(BACKEND_DIR, path))
+    return client.get_collection(name=collection)
+
+
+def synthetic_store(rows, seed):
+    rng = np.random.default_rng(seed)
+    matrix = normalize(rng.standard_normal((rows, DIMENSIONS)))
+    ids = [f"row_{i}" for i in range(rows)]
+    return NumpyVectorStore("synthetic", matrix, ids, ids, [{}] * rows)
+
+
+def make_queries(store, count, noise, seed):
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(store.count(), size=min(count, store.count()), replace=False)
+    base = store.matrix[rows].astype(np.float32)
+    return normalize(base + noise * rng.standard_normal(base.shape))
+
+
+def measure(query, queries, truth, k):
+    """Per-query latency, batched throughput and recall@k of one backend"""
+    latencies, found = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        result = query([vector], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found.append(result["ids"][0])
+
+    start = time.perf_counter()
+    query(queries, k)
+    batch_seconds = time.perf_counter() - start
+
+    recall = [len(set(ids) & set(exact)) / k for ids, exact in zip(found, truth)]
+    return {
+        f"recall@{k}": round(statistics.mean(recall), 4),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "mean": round(statistics.mean(latencies), 3),
+        },
+        "batched_queries_per_second": round(len(queries) / batch_seconds, 1),
+    }
+
+
+def run(args):
+    collection = None
+    if args.synthetic:
+        exact = synthetic_store(args.synthetic, args.seed)
+        load_seconds = {}
+    else:
+        collection = open_collection(args.collection)
+        start = time.perf_counter()
+        exact = NumpyVectorStore.from_collection(collection, np.float32)
+        load_seconds = {"numpy-float32": round(time.perf_counter() - start, 2)}
+
+    half = NumpyVectorStore(
+        exact.name,
+        exact.matrix.astype(np.float16),
+        exact.ids,
+        exact.documents,
+        exact.metadatas,
+    )
+    export_dir = tempfile.mkdtemp(prefix="bench_vectors_")
+    exact.export(export_dir)
+    start = time.perf_counter()
+    mapped = MappedVectorStore(export_dir)
+    load_seconds["mmap-open"] = round(time.perf_counter() - start, 4)
+
+    queries = make_queries(exact, args.queries, args.noise, args.seed)
+    truth = [exact.ids[rows].tolist() for rows in exact.top_k(queries, args.k)[0]]
+
+    def store_query(store):
+        return lambda vectors, k: store.query(vectors, k, include=("distances",))
+
+    backends = {
+        "numpy-float32": store_query(exact),
+        "numpy-float16": store_query(half),
+        # Fetches documents and metadata too, since those are decoded per query
+        "mmap": lambda vectors, k: mapped.query(vectors, k),
+    }
+    if collection is not None:
+        backends["chroma"] = lambda vectors, k: collection.query(
+            query_embeddings=np.asarray(vectors).tolist(),
+            n_results=k,
+            include=["distances"],
+        )
+
+    summary = {
+        "collection": args.collection if collection is not None else "synthetic",
+        "vectors": exact.count(),
+        "queries": len(queries),
+        "k": args.k,
+        "matrix_mb": {
+            "numpy-float32": round(exact.nbytes() / 2**20, 1),
+            "numpy-float16": round(half.nbytes() / 2**20, 1),
+        },
+        "load_seconds": load_seconds,
+        "backends": {
+            name: measure(query, queries, truth, args.k)
+            for name, query in backends.items()
+        },
+    }
+
+    shutil.rmtree(export_dir)
+
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collection", choices=COLLECTIONS, default="laws")
+    parser.add_argument("--synthetic", type=int, help="random vectors instead of a DB")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--noise", type=float, default=0.05, help="query perturbation (std dev)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the summary to this JSON file")
+    run(parser.parse_args())
@@ -0,0 +1,86 @@
+"""Deterministic fake Groq server for offline load tests.
+
+Serves POST /openai/v1/chat/completions (streaming and non-streaming) from the same
+FakeBackend as LLM_BACKEND=fake/replay, but over HTTP, so the API under test keeps
+its real Groq client and network path:
+
+    python benchmarks/fake_groq_server.py --port 8001 --latency lognormal:800,0.5
+    GROQ_BASE_URL=http://127.0.0.1:8001 GROQ_API_KEY=fake uvicorn main:app
+
+Pass --fixtures to replay responses recorded with LLM_BACKEND=record.
+"""
+
+import argparse
+import os
+import sys
+
+import groq
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_backend import FakeBackend, FixtureStore, parse_latency
+
+
+def create_app(backend):
+    app = FastAPI(title="Fake Groq")
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        kwargs = await request.json()
+        try:
+            result = await backend.create(**kwargs)
+        except groq.RateLimitError as e:
+            return JSONResponse(
+                {"error": {"message": e.message, "type": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after": e.response.headers["retry-after"]},
+            )
+
+        if not kwargs.get("stream"):
+            return JSONResponse(result.model_dump(exclude_none=True))
+
+        async def events():
+            async for chunk in result:
+                yield f"data: {chunk.model_dump_json(exclude_none=True)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    def read_stats():
+        return backend.snapshot()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:800,0.5",
+        help='latency distribution, e.g. "fixed:500", "uniform:300,1500", "recorded"',
+    )
+    parser.add_argument(
+        "--fixtures", help="JSONL fixtures recorded with LLM_BACKEND=record"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 429s")
+    parser.add_argument("--agent-rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    backend = FakeBackend(
+        parse_latency(args.latency),
+        fixtures=FixtureStore(args.fixtures) if args.fixtures else None,
+        seed=args.seed,
+        error_rate=args.error_rate,
+        agent_rounds=args.agent_rounds,
+    )
+    uvicorn.run(
+        create_app(backend), host=args.host, port=args.port, log_level="warning"
+    )
@@ -1,7 +1,11 @@
 import os
 import json
+import time
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
+from case_index import CaseIndex, normalize_sections
+from embeddings import embedding_function_from_env
+from vector_store import NumpyVectorStore
 
 
 def load_cases_data(dataset_path):
@@ -40,10 +44,18 @@ def load_cases_data(dataset_path):
                     if sec.get("section")
                 ]
                 sections_str = ", ".join(ipc_list) if ipc_list else "None specified"
+                # Normalized section numbers ("302,34"), for the case index filters
+                sections = normalize_sections(
+                    sec.get("section_number") or sec.get("section") or ""
+                    for sec in case.get("ipc_section", [])
+                )
 
                 metadata = {
                     "case_number": case_number,
                     "sections_applied": sections_str,
+                    "sections": ",".join(sections),
+                    "category": str(case.get("category", "")),
+                    "year": int(case.get("year") or 0),
                     "outcome": str(outcome),
                     "jail_term": str(jail_term),
                     "fine_inr": str(fine_inr),
@@ -74,9 +86,7 @@ def build_cases_vector_db():
     print("Initializing ChromaDB persistent client...")
     client = chromadb.PersistentClient(path=db_path)
 
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    sentence_transformer_ef = embedding_function_from_env()
 
     try:
         client.delete_collection(name="historical_cases")
@@ -87,7 +97,8 @@ def build_cases_vector_db():
     collection = client.create_collection(
         name="historical_cases",
         embedding_function=sentence_transformer_ef,
-        metadata={"hnsw:space": "cosine"},
+        # built_at changes on every build, so servers drop results cached before it
+        metadata={"hnsw:space": "cosine", "built_at": time.time()},
     )
 
     BATCH_SIZE = 5000
@@ -107,6 +118,18 @@ def build_cases_vector_db():
     print(f"✅ Historical Cases Vector DB setup successfully! Stored at '{db_path}'")
     print(f"Collection currently contains {collection.count()} documents.")
 
+    # Memory-mapped copy, searched when CASES_VECTOR_STORE=mmap
+    export_path = os.path.join(os.path.dirname(__file__), "cases_vectors")
+    dtype = np.dtype(os.getenv("VECTOR_STORE_DTYPE", "float32"))
+    NumpyVectorStore.from_collection(collection, dtype).export(export_path)
+    print(f"✅ Historical cases vectors exported to '{export_path}' ({dtype})")
+
+    # Section / category / year filters of search_historical_cases
+    index_path = os.path.join(os.path.dirname(__file__), "cases_index.npz")
+    index = CaseIndex.build(ids, metadatas)
+    index.save(index_path)
+    print(f"✅ Case index saved to '{index_path}' ({index.snapshot()})")
+
 
 if __name__ == "__main__":
     build_cases_vector_db()
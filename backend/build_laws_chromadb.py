@@ -1,7 +1,11 @@
 import os
 import json
+import time
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
+from embeddings import embedding_function_from_env
+from lexical_index import DEFAULT_INDEX_PATH, build_law_index
+from vector_store import NumpyVectorStore
 
 
 def load_laws_data(laws_dir):
@@ -63,10 +67,8 @@ def build_vector_db():
     print("Initializing ChromaDB persistent client...")
     client = chromadb.PersistentClient(path=db_path)
 
-    # We use the all-MiniLM-L6-v2 model
-    sentence_transformer_ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    # We use the all-MiniLM-L6-v2 model (PyTorch or ONNX, per EMBEDDING_BACKEND)
+    sentence_transformer_ef = embedding_function_from_env()
 
     # Re-create the collection to ensure it's fresh
     try:
@@ -78,7 +80,8 @@ def build_vector_db():
     collection = client.create_collection(
         name="indian_laws",
         embedding_function=sentence_transformer_ef,
-        metadata={"hnsw:space": "cosine"},
+        # built_at changes on every build, so servers drop results cached before it
+        metadata={"hnsw:space": "cosine", "built_at": time.time()},
     )
 
     # Add items to Chroma DB in batches to prevent memory overflow
@@ -99,6 +102,16 @@ def build_vector_db():
     print(f"✅ Vector DB setup successfully! Stored at '{db_path}'")
     print(f"Collection currently contains {collection.count()} documents.")
 
+    # Memory-mapped copy, searched when LAWS_VECTOR_STORE=mmap
+    export_path = os.path.join(os.path.dirname(__file__), "laws_vectors")
+    dtype = np.dtype(os.getenv("VECTOR_STORE_DTYPE", "float32"))
+    NumpyVectorStore.from_collection(collection, dtype).export(export_path)
+    print(f"✅ Laws vectors exported to '{export_path}' ({dtype})")
+
+    # The BM25 side of hybrid retrieval is built from the same laws_json
+    build_law_index(laws_dir, DEFAULT_INDEX_PATH)
+    print(f"✅ Lexical index saved to '{DEFAULT_INDEX_PATH}'")
+
 
 if __name__ == "__main__":
     build_vector_db()
@@ -703,6 +703,7 @@ def build_record(
     Converts a raw parquet row + judgment text into the target schema:
     {
         case_number,
+        year,
         ipc_section   [ {section, section_number, offense_name, offense_category, is_primary} ],
         crime_keywords [ plain text keywords ],
         crime_details  (plain text),
@@ -747,6 +748,7 @@ def build_record(
 
     return {
         "case_number": case_number,
+        "year": year_int,
         "ipc_section": ipc_sections,
         "crime_keywords": crime_keywords,
         "crime_details": crime_details,
@@ -870,6 +872,7 @@ def main():
             "coverage": f"{START_YEAR}–{END_YEAR}",
             "output_fields": {
                 "case_number": "CNR / Case title from SC metadata",
+                "year": "Year of the judgment",
                 "ipc_section": "Extracted IPC sections — [{section, section_number, offense_name, offense_category, is_primary}]",
                 "crime_keywords": "Keywords found in the case text matching the crime/category lists",
                 "crime_details": "Plain-text crime summary extracted from judgment",
@@ -0,0 +1,191 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), "cases_index.npz")
+
+# Categories build_legal_dataset.py sorts cases into
+CATEGORIES = ("civil", "criminal", "traffic")
+
+# "302", "498-A", "304 B", "376D"; a letter after a space only when it stands alone,
+# so "302 of IPC" stays "302". Never part of a longer number such as an act's year.
+_NUMBER = r"\d{1,3}(?!\d)(?:-?[A-Z]{1,2}\b|\s[A-Z]\b)?"
+# The number after "Section" / "Sec." / "S." / "u/s" wins over any other number
+_SECTION = re.compile(rf"\b(?:SECTIONS?|SECS?|S|U/S)\.?[\s-]*({_NUMBER})")
+_BARE_SECTION = re.compile(rf"\b({_NUMBER})")
+
+
+def normalize_section(section):
+    """'Section 498-A IPC' / '304 b' / '302(1)' / 392 -> '498A' / '304B' / '302' / '392'.
+
+    'IPC, 1860 Section 302' -> '302'. None when there is no section number in it.
+    """
+    section = str(section).upper()
+    match = _SECTION.search(section) or _BARE_SECTION.search(section)
+    return re.sub(r"[\s-]", "", match.group(1)) if match else None
+
+
+def normalize_sections(sections):
+    """Normalized section numbers of a list (or comma-separated string), without repeats"""
+    if sections is None:
+        return []
+    if isinstance(sections, (str, int)):
+        sections = re.split(r"[,;/&]|\band\b", str(sections))
+    normalized = []
+    for section in sections:
+        section = normalize_section(section)
+        if section and section not in normalized:
+            normalized.append(section)
+    return normalized
+
+
+@dataclass(frozen=True)
+class CaseFilter:
+    """Restricts a precedent search to cases that applied any of `sections`, in
+    `category`, decided between `year_from` and `year_to` (each bound optional)"""
+
+    sections: tuple = ()
+    category: str = None
+    year_from: int = None
+    year_to: int = None
+
+    def describe(self):
+        parts = []
+        if self.sections:
+            parts.append("Sections " + ", ".join(self.sections))
+        if self.category:
+            parts.append(f"category {self.category}")
+        if self.year_from or self.year_to:
+            parts.append(f"years {self.year_from or '…'}–{self.year_to or '…'}")
+        return "; ".join(parts)
+
+
+def case_filter(sections=None, category=None, year_from=None, year_to=None):
+    """A CaseFilter from loosely typed input (e.g. tool call arguments), or None.
+
+    Sections without a number and categories other than CATEGORIES are ignored.
+    """
+    sections = tuple(normalize_sections(sections))
+    category = str(category or "").strip().lower()
+    category = category if category in CATEGORIES else None
+    years = []
+    for year in (year_from, year_to):
+        try:
+            years.append(int(year) if year not in (None, "") else None)
+        except (TypeError, ValueError):
+            years.append(None)
+    if not sections and not category and not any(years):
+        return None
+    return CaseFilter(sections, category, *years)
+
+
+class CaseIndex:
+    """Sections, category and year of every case in the cases DB, for filtered search.
+
+    Sections are an inverted index (section -> slice of `case_rows`, flat arrays as in
+    LexicalIndex); categories and years are arrays indexed by row. Written next to
+    the DB by build_cases_chromadb.py.
+    """
+
+    def __init__(self, ids, categories, years, vocab, offsets, case_rows):
+        self.ids = np.asarray(ids)
+        self.categories = np.asarray(categories)
+        self.years = np.asarray(years, dtype=np.int32)
+        self.vocab = vocab
+        self.offsets = offsets
+        self.case_rows = case_rows
+        self.terms = {section: i for i, section in enumerate(vocab)}
+
+    @classmethod
+    def build(cls, ids, metadatas):
+        """From the cases DB's ids and metadata ("sections", "category", "year")"""
+        postings = {}
+        for row, meta in enumerate(metadatas):
+            for section in filter(None, str(meta.get("sections", "")).split(",")):
+                postings.setdefault(section, []).append(row)
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[section]) for section in vocab])
+        case_rows = np.array(
+            [row for section in vocab for row in postings[section]], dtype=np.int32
+        )
+        return cls(
+            ids,
+            [str(meta.get("category", "")) for meta in metadatas],
+            [int(meta.get("year") or 0) for meta in metadatas],
+            vocab,
+            offsets,
+            case_rows,
+        )
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        np.savez_compressed(
+            path,
+            ids=self.ids,
+            categories=self.categories,
+            years=self.years,
+            vocab=np.array(self.vocab),
+            offsets=self.offsets,
+            case_rows=self.case_rows,
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["ids"],
+                data["categories"],
+                data["years"],
+                data["vocab"].tolist(),
+                data["offsets"],
+                data["case_rows"],
+            )
+
+    def matching(self, case_filter):
+        """Ids of the cases that pass `case_filter`, in DB order.
+
+        Cases with an unknown year (0) fail any year bound.
+        """
+        mask = np.ones(len(self.ids), dtype=bool)
+        if case_filter.sections:
+            applied = np.zeros(len(self.ids), dtype=bool)
+            for section in case_filter.sections:
+                i = self.terms.get(section)
+                if i is not None:
+                    start, end = self.offsets[i], self.offsets[i + 1]
+                    applied[self.case_rows[start:end]] = True
+            mask &= applied
+        if case_filter.category:
+            mask &= self.categories == case_filter.category
+        if case_filter.year_from:
+            mask &= self.years >= case_filter.year_from
+        if case_filter.year_to:
+            mask &= (self.years > 0) & (self.years <= case_filter.year_to)
+        return self.ids[mask].tolist()
+
+    def snapshot(self):
+        return {
+            "cases": len(self.ids),
+            "sections": len(self.vocab),
+            "postings": len(self.case_rows),
+        }
+
+
+def load_case_index(path=DEFAULT_INDEX_PATH):
+    """The saved case index, or None when build_cases_chromadb.py has not written it"""
+    if not os.path.exists(path):
+        print(
+            f"Case index '{path}' not found. Please run build_cases_chromadb.py first."
+        )
+        return None
+    start = time.perf_counter()
+    index = CaseIndex.load(path)
+    print(
+        f"Case index ready: {len(index.ids)} cases, {len(index.vocab)} sections "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return index
@@ -0,0 +1,99 @@
+import re
+
+# Ways an act is written in case descriptions and LLM output, per laws_json file
+ACT_ALIASES = {
+    "IPC": [r"indian\s+penal\s+code", r"penal\s+code", r"i\.?\s?p\.?\s?c\.?"],
+    "CRPC": [
+        r"code\s+of\s+criminal\s+procedure",
+        r"criminal\s+procedure\s+code",
+        r"cr\.?\s?p\.?\s?c\.?",
+    ],
+    "CPC": [
+        r"code\s+of\s+civil\s+procedure",
+        r"civil\s+procedure\s+code",
+        r"c\.?\s?p\.?\s?c\.?",
+    ],
+    "IEA": [r"(?:indian\s+)?evidence\s+act", r"i\.?\s?e\.?\s?a\.?"],
+    "MVA": [r"motor\s+vehicles?\s+act", r"m\.?\s?v\.?\s?act", r"mva"],
+    "NIA": [r"negotiable\s+instruments?\s+act", r"n\.?\s?i\.?\s?act", r"nia"],
+    "HMA": [r"hindu\s+marriage\s+act", r"h\.?\s?m\.?\s?a\.?"],
+    "IDA": [r"(?:indian\s+)?divorce\s+act", r"i\.?\s?d\.?\s?a\.?"],
+}
+
+_ACTS = [
+    (law, re.compile(rf"(?:{alias})$", re.I))
+    for law, aliases in ACT_ALIASES.items()
+    for alias in aliases
+]
+
+_ACT_PATTERN = "|".join(alias for aliases in ACT_ALIASES.values() for alias in aliases)
+_TOKEN = re.compile(
+    r"(?P<item>^[ \t]*\d{1,3}[.)](?=\s))"  # "2." opening a numbered list line
+    rf"|(?<![a-z])(?P<act>{_ACT_PATTERN})(?![a-z])"
+    r"|(?P<marker>\bu/s\b\.?|\br/w\b|\bread\s+with\b|\bsec(?:tion)?s?\b\.?"
+    r"|\bs\.(?=\s*\d)|§+)"
+    r"|(?P<num>\b\d{1,3}(?:\s?-\s?[a-z]{1,2}\b|[a-z]{1,2}\b|\s(?-i:[A-Z])(?![\w.]))?"
+    r"(?:\(\w{1,4}\))*)"
+    r"|(?P<sep>[,/&:]|\band\b|\bor\b|\bof\b|\bthe\b|\bunder\b)"
+    r"|(?P<other>[^\s,/&:]+)",
+    re.I | re.M,
+)
+
+
+def _law(alias):
+    for law, pattern in _ACTS:
+        if pattern.match(alias):
+            return law
+    return None
+
+
+def _section(number):
+    """'498-A' / '304 a' / '154(1)' -> '498A' / '304A' / '154'"""
+    return re.sub(r"[\s-]", "", number.split("(")[0]).upper()
+
+
+def parse_citations(text):
+    """(law, section) pairs cited in `text`, in order of appearance, without repeats.
+
+    Understands "IPC Section 378", "Section 378 of the IPC", "u/s 302 r/w 34 IPC",
+    "Sections 323, 324 and 506 IPC", "CrPC 154(1)", "498-A" and numbered lists of
+    such lines. A run of section numbers takes the act written just before it, else
+    the act just after it, else the last act mentioned earlier in the text. Bare
+    numbers with neither a section marker nor an adjacent act ("2 lakh") are ignored.
+    The pairs are not checked against laws_json.
+    """
+    citations = []
+    run = []
+    cue = False  # the run follows a section marker or an act
+    lead_act = None  # act written just before the current run
+    last_act = None
+
+    def close(following_act=None):
+        nonlocal cue, lead_act
+        law = lead_act or following_act or last_act
+        if run and law and (cue or following_act):
+            for number in run:
+                if (law, number) not in citations:
+                    citations.append((law, number))
+        if run and following_act and not lead_act:
+            following_act = None  # consumed as this run's act, not the next one's
+        run.clear()
+        cue = False
+        lead_act = following_act
+
+    for match in _TOKEN.finditer(text):
+        kind, value = match.lastgroup, match.group()
+        if kind == "act":
+            law = _law(value)
+            close(law)
+            if lead_act:
+                cue = True
+            last_act = law
+        elif kind == "marker":
+            cue = True
+        elif kind == "num":
+            run.append(_section(value))
+        elif kind in ("item", "other"):
+            close()
+    close()
+    return citations
@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+BATCH_SIZE = metrics.Histogram(
+    "lawgorithm_embedding_batch_size",
+    "Query texts encoded per batched forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+BATCH_WAIT_SECONDS = metrics.Histogram(
+    "lawgorithm_embedding_batch_wait_seconds",
+    "Time a query text waited for its batch to start encoding.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+ENCODE_SECONDS = metrics.Histogram(
+    "lawgorithm_embedding_encode_seconds",
+    "Duration of one batched forward pass.",
+)
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text encodes into batched forward passes.
+
+    Callers on any thread (`embed`) or event loop (`aembed`) enqueue one text each. A
+    single encoder thread takes the first waiting text, keeps collecting for up to
+    `max_wait` seconds or until `max_batch` texts, and encodes them with one
+    `encode(texts)` call. A lone request pays at most `max_wait` extra; under load the
+    model runs fewer, larger batches.
+    """
+
+    def __init__(self, encode, max_batch=32, max_wait=0.003):
+        self._encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.SimpleQueue()  # (text, future, enqueued at)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"texts": 0, "batches": 0, "max_batch_seen": 0}
+
+    def submit(self, text):
+        """Queue `text` for encoding; returns a concurrent.futures.Future of its vector"""
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text):
+        """Blocking encode of one text (for the retrieval thread pool)"""
+        return self.submit(text).result()
+
+    async def aembed(self, text):
+        """Encode one text without holding a thread while the batch fills"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        # Skip callers that gave up (e.g. a cancelled request) while queued
+        return [item for item in batch if item[1].set_running_or_notify_cancel()]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            for _, _, enqueued in batch:
+                BATCH_WAIT_SECONDS.observe(start - enqueued)
+            BATCH_SIZE.observe(len(batch))
+            self.stats["texts"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+
+            try:
+                vectors = self._encode([text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                ENCODE_SECONDS.observe(time.perf_counter() - start)
+            for (_, future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def snapshot(self):
+        texts, batches = self.stats["texts"], self.stats["batches"]
+        return {
+            **self.stats,
+            "avg_batch": round(texts / batches, 2) if batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
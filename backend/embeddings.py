@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+
+# The model both vector DBs are built with
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+HF_MODEL_ID = f"sentence-transformers/{EMBEDDING_MODEL_NAME}"
+# Longest input the sentence-transformers model encodes; longer texts are truncated
+MAX_SEQ_LENGTH = 256
+
+SENTENCE_TRANSFORMERS = "sentence-transformers"
+ONNX = "onnx"
+ONNX_INT8 = "onnx-int8"
+ONNX_MODEL_FILES = {ONNX: "model.onnx", ONNX_INT8: "model_int8.onnx"}
+
+DEFAULT_ONNX_DIR = os.path.join(
+    os.path.dirname(__file__), "embedding_models", f"{EMBEDDING_MODEL_NAME}-onnx"
+)
+
+
+class OnnxEmbeddingFunction:
+    """all-MiniLM-L6-v2 on ONNX Runtime, without importing PyTorch.
+
+    Reproduces the sentence-transformers pipeline: WordPiece tokens truncated to
+    MAX_SEQ_LENGTH, mean pooling over the attention mask, L2 normalisation. The model
+    directory is written by export_onnx_embeddings.py (`model.onnx`, its dynamically
+    quantized `model_int8.onnx`, and `tokenizer.json`).
+    """
+
+    def __init__(self, model_dir=DEFAULT_ONNX_DIR, model_file=None, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_path = os.path.join(
+            model_dir, model_file or ONNX_MODEL_FILES[ONNX_INT8]
+        )
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"ONNX embedding model '{self.model_path}' not found. "
+                "Please run export_onnx_embeddings.py first."
+            )
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            self.model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, input):
+        encodings = self.tokenizer.encode_batch(list(input))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        hidden = self.session.run(None, feeds)[0]  # (batch, tokens, 384)
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return [row.astype(np.float32) for row in pooled]
+
+
+def sentence_transformer_function():
+    """The float PyTorch model through ChromaDB's sentence-transformers wrapper"""
+    from chromadb.utils import embedding_functions
+
+    return embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=EMBEDDING_MODEL_NAME
+    )
+
+
+def embedding_function(backend=SENTENCE_TRANSFORMERS, onnx_dir=DEFAULT_ONNX_DIR):
+    """Embedding function for `backend`: sentence-transformers, onnx or onnx-int8"""
+    if backend == SENTENCE_TRANSFORMERS:
+        return sentence_transformer_function()
+    if backend in ONNX_MODEL_FILES:
+        return OnnxEmbeddingFunction(onnx_dir, ONNX_MODEL_FILES[backend])
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend!r}")
+
+
+def embedding_function_from_env():
+    """Embedding function selected by EMBEDDING_BACKEND (and EMBEDDING_ONNX_DIR)"""
+    return embedding_function(
+        os.getenv("EMBEDDING_BACKEND", SENTENCE_TRANSFORMERS).lower(),
+        os.getenv("EMBEDDING_ONNX_DIR", DEFAULT_ONNX_DIR),
+    )
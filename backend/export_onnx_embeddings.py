@@ -0,0 +1,60 @@
+import argparse
+import os
+
+from embeddings import DEFAULT_ONNX_DIR, HF_MODEL_ID, ONNX, ONNX_INT8, ONNX_MODEL_FILES
+
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def export_onnx(output_dir=DEFAULT_ONNX_DIR):
+    """Export all-MiniLM-L6-v2 to ONNX and quantize its weights to int8.
+
+    Writes the float graph (model.onnx), the dynamically quantized graph
+    (model_int8.onnx) and the fast tokenizer (tokenizer.json) to `output_dir`.
+    Needs torch and transformers (installed with sentence-transformers) plus onnx and
+    onnxruntime; serving the exported model only needs onnxruntime and tokenizers.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, ONNX_MODEL_FILES[ONNX])
+    int8_path = os.path.join(output_dir, ONNX_MODEL_FILES[ONNX_INT8])
+
+    print(f"Loading {HF_MODEL_ID}...")
+    tokenizer = AutoTokenizer.from_pretrained(HF_MODEL_ID)
+    model = AutoModel.from_pretrained(HF_MODEL_ID).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    print(f"Exporting float model to {fp32_path}...")
+    sample = tokenizer(["Theft of a mobile phone at a bus stop"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "tokens"} for name in INPUT_NAMES}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in INPUT_NAMES),
+            fp32_path,
+            input_names=INPUT_NAMES,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    print(f"Quantizing weights to int8 at {int8_path}...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    for path in (fp32_path, int8_path):
+        print(f"  {os.path.basename(path)}: {os.path.getsize(path) / 2**20:.1f} MB")
+    print(
+        "✅ ONNX embedding model exported. Check parity with "
+        "benchmarks/bench_embeddings.py, then set EMBEDDING_BACKEND=onnx-int8."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--output-dir", default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+    export_onnx(args.output_dir)
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+
+from fastapi import HTTPException
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobStore:
+    """SQLite-backed job table, shared by every uvicorn worker on the host.
+
+    Each job keeps its request and the result of every finished stage, so a job picked
+    up again after a restart resumes at the first stage without a result. Finished,
+    failed and cancelled jobs are deleted `ttl_seconds` after they ended.
+    """
+
+    def __init__(self, db_path, ttl_seconds=7 * 86400):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT,
+                    request TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )""")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, request):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, results, created_at, updated_at) "
+                "VALUES (?, ?, ?, '{}', ?, ?)",
+                (job_id, QUEUED, json.dumps(request), now, now),
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?, ?) AND updated_at <= ?",
+                (*FINISHED, now - self.ttl_seconds),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["results"] = json.loads(job["results"])
+        return job
+
+    def claim_next(self, lease_seconds):
+        """Atomically take the oldest queued job, or a running one whose worker went quiet"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now - lease_seconds),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        return self.get(row["id"]) if row is not None else None
+
+    def start_stage(self, job_id, stage):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (stage, time.time(), job_id, RUNNING),
+            )
+
+    def heartbeat(self, job_id):
+        """Renew a running job's lease, so claim_next leaves it to its worker"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                (time.time(), job_id, RUNNING),
+            )
+
+    def save_result(self, job_id, stage, result):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET results = json_set(results, ?, json(?)), updated_at = ? "
+                "WHERE id = ?",
+                (f"$.{stage}", json.dumps(result), time.time(), job_id),
+            )
+
+    def finish(self, job_id, status, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND status = ?",
+                (status, error, time.time(), job_id, RUNNING),
+            )
+
+    def requeue(self, job_id):
+        """Hand a running job back to the queue (used on graceful shutdown)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, RUNNING),
+            )
+
+    def cancel(self, job_id):
+        """Mark an unfinished job cancelled. Returns False if it had already finished."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+        return cursor.rowcount > 0
+
+    def status(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return row["status"] if row else None
+
+    def queue_depth(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs WHERE status IN (?, ?) GROUP BY status",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+class JobRunner:
+    """Worker coroutines that execute queued jobs stage by stage.
+
+    `stages` is an ordered list of (name, async fn(request, results) -> result). Workers
+    poll the store, and are woken immediately when a job is submitted in this process.
+    Store calls run on worker threads, off the event loop. A running job's lease is
+    renewed every third of `lease_seconds`, so only a job whose worker died is taken
+    over, however long a stage takes.
+    """
+
+    def __init__(self, store, stages, workers=2, poll_interval=1.0, lease_seconds=900):
+        self.store = store
+        self.stages = stages
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self._running = {}  # job id -> task executing it in this process
+        self._stopping = False
+
+    @property
+    def stage_names(self):
+        return [name for name, _ in self.stages]
+
+    async def start(self):
+        self._stopping = False
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, request):
+        job_id = await asyncio.to_thread(self.store.create, request)
+        self._wakeup.set()
+        return job_id
+
+    async def cancel(self, job_id):
+        cancelled = await asyncio.to_thread(self.store.cancel, job_id)
+        task = self._running.get(job_id)
+        if cancelled and task is not None:
+            task.cancel()
+        return cancelled
+
+    async def _work(self):
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next, self.lease_seconds)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run(job))
+            self._running[job["id"]] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if self._stopping:
+                    await asyncio.to_thread(self.store.requeue, job["id"])
+                    raise
+                # otherwise only this job was cancelled (DELETE /api/jobs/{id})
+            finally:
+                self._running.pop(job["id"], None)
+
+    async def _heartbeat(self, job_id):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, job_id)
+            except Exception as e:
+                print(f"Error renewing the lease of job {job_id}: {str(e)}")
+
+    async def _run(self, job):
+        job_id, results = job["id"], job["results"]
+        store = self.store
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            for name, run_stage in self.stages:
+                if name in results:
+                    continue  # finished before a restart
+                if await asyncio.to_thread(store.status, job_id) != RUNNING:
+                    return  # cancelled from another worker process
+                await asyncio.to_thread(store.start_stage, job_id, name)
+                results[name] = await run_stage(job["request"], results)
+                await asyncio.to_thread(store.save_result, job_id, name, results[name])
+            await asyncio.to_thread(store.finish, job_id, COMPLETED)
+        except HTTPException as e:
+            await asyncio.to_thread(store.finish, job_id, FAILED, f"{name}: {e.detail}")
+        except Exception as e:
+            print(f"Error running job {job_id}: {str(e)}")
+            await asyncio.to_thread(store.finish, job_id, FAILED, f"{name}: {str(e)}")
+        finally:
+            heartbeat.cancel()
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+LAWS_DIR = os.path.join(os.path.dirname(__file__), "laws_json")
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), "laws_bm25.npz")
+
+# Okapi BM25 parameters
+K1 = 1.2
+B = 0.75
+# Title words count this many times in a section's term frequencies
+TITLE_WEIGHT = 2
+
+STOPWORDS = frozenset(
+    "a an and are as at be been by for from had has have he her his i in is it its "
+    "me my of on or our she so that the their them they this to was we were which "
+    "who will with".split()
+)
+
+# hma.json is a CSV export split across JSON objects: "chapter,section,title,desc"
+_CSV_RECORD = re.compile(r'^(\d+),(\d+[A-Z]*),("[^"]*"|[^,"]*),(.*)$', re.S)
+
+
+@dataclass(frozen=True)
+class LawSection:
+    """One section of an act in laws_json"""
+
+    law: str
+    section: str
+    title: str
+    description: str
+    chapter: str = ""
+
+
+def section_key(law, section):
+    """(law, section) in the form both the vector DB and the lexical index agree on"""
+    return law.upper(), str(section).strip().rstrip(".").upper()
+
+
+def _csv_sections(law, items):
+    records = []
+    for item in items:
+        for line in item.values():
+            match = _CSV_RECORD.match(line)
+            if match:
+                records.append(list(match.groups()))
+            elif records:
+                records[-1][3] += "\n" + line
+    return [
+        LawSection(
+            law=law,
+            section=section,
+            title=title.strip('"'),
+            description=desc.strip().strip('"'),
+            chapter=chapter,
+        )
+        for chapter, section, title, desc in records
+    ]
+
+
+def load_law_sections(laws_dir=LAWS_DIR):
+    """Every section in laws_json, across the files' schema variations"""
+    sections = []
+    for file_name in sorted(os.listdir(laws_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        law = file_name.replace(".json", "").upper()
+        with open(os.path.join(laws_dir, file_name), "r", encoding="utf-8") as f:
+            items = json.load(f)
+        if items and len(items[0]) == 1:
+            sections.extend(_csv_sections(law, items))
+            continue
+        for item in items:
+            section = str(item.get("Section", item.get("section", ""))).strip()
+            title = item.get("section_title", item.get("title", "")) or ""
+            desc = item.get("section_desc", item.get("description", "")) or ""
+            if section or title or desc:
+                sections.append(
+                    LawSection(
+                        law=law,
+                        section=section.rstrip("."),
+                        title=title.strip(),
+                        description=desc.strip(),
+                        chapter=str(item.get("chapter", "")),
+                    )
+                )
+    return sections
+
+
+def tokenize(text):
+    """Lowercased words and section numbers ("304a"), minus stopwords"""
+    tokens = []
+    for token in re.findall(r"[a-z]+|\d+[a-z]?", text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Crude plural folding: "sections" -> "section", "offences" -> "offence"
+        if len(token) > 4 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def query_terms(query):
+    """Terms of a search query. Numbers also match a section's own number field."""
+    tokens = tokenize(query)
+    return tokens + [f"s:{t}" for t in tokens if t[0].isdigit()]
+
+
+def document_terms(section):
+    terms = tokenize(f"{section.law} {section.description}")
+    terms += tokenize(section.title) * TITLE_WEIGHT
+    terms.append(f"s:{section_key(section.law, section.section)[1].lower()}")
+    return terms
+
+
+def source_signature(laws_dir=LAWS_DIR):
+    """Changes whenever a laws_json file is added, removed or edited"""
+    digest = hashlib.blake2b(digest_size=16)
+    for file_name in sorted(os.listdir(laws_dir)):
+        if file_name.endswith(".json"):
+            stat = os.stat(os.path.join(laws_dir, file_name))
+            digest.update(f"{file_name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over law sections.
+
+    Postings are stored as flat arrays (term -> slice of `doc_ids` / `weights`) with
+    the BM25 weight of every posting precomputed, so a query is a handful of
+    vectorised adds. Saved as a compressed .npz holding the postings and the sections'
+    text, which loads without re-tokenizing the corpus.
+    """
+
+    def __init__(self, sections, vocab, offsets, doc_ids, tfs, signature=""):
+        self.sections = sections
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.signature = signature
+        self.terms = {term: i for i, term in enumerate(vocab)}
+        self.by_key = {}  # section_key -> first section with that number in its act
+        for section in sections:
+            self.by_key.setdefault(section_key(section.law, section.section), section)
+
+        doc_len = np.bincount(doc_ids, weights=tfs, minlength=len(sections))
+        avg_len = doc_len.mean() if len(sections) else 1.0
+        df = np.diff(offsets)
+        idf = np.log(1 + (len(sections) - df + 0.5) / (df + 0.5))
+        norm = K1 * (1 - B + B * doc_len[doc_ids] / avg_len)
+        self.weights = (np.repeat(idf, df) * tfs * (K1 + 1) / (tfs + norm)).astype(
+            np.float32
+        )
+
+    @classmethod
+    def build(cls, sections, signature=""):
+        postings = {}
+        for doc, section in enumerate(sections):
+            for term in document_terms(section):
+                counts = postings.setdefault(term, {})
+                counts[doc] = counts.get(doc, 0) + 1
+
+        vocab = sorted(postings)
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids, tfs = [], []
+        for i, term in enumerate(vocab):
+            doc_ids.extend(postings[term])
+            tfs.extend(postings[term].values())
+            offsets[i + 1] = len(doc_ids)
+        return cls(
+            sections,
+            vocab,
+            offsets,
+            np.array(doc_ids, dtype=np.int32),
+            np.array(tfs, dtype=np.float32),
+            signature,
+        )
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        sections = json.dumps([asdict(s) for s in self.sections]).encode("utf-8")
+        np.savez_compressed(
+            path,
+            vocab=np.array(self.vocab),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            tfs=self.tfs.astype(np.uint16),
+            sections=np.frombuffer(sections, dtype=np.uint8),
+            signature=np.array(self.signature),
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            sections = json.loads(data["sections"].tobytes().decode("utf-8"))
+            return cls(
+                [LawSection(**s) for s in sections],
+                data["vocab"].tolist(),
+                data["offsets"],
+                data["doc_ids"],
+                data["tfs"].astype(np.float32),
+                str(data["signature"]),
+            )
+
+    def find(self, law, section):
+        """The LawSection for a cited (law, section), or None.
+
+        Only exact matches count: a lettered section the act does not have ("302A")
+        is not resolved to its plain number, which is a different offence.
+        """
+        return self.by_key.get(section_key(law, section))
+
+    def search(self, query, limit=10):
+        """Top `limit` (section index, BM25 score) pairs, best first"""
+        scores = np.zeros(len(self.sections), dtype=np.float32)
+        for term in query_terms(query):
+            i = self.terms.get(term)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > limit:
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(int(doc), float(scores[doc])) for doc in matched]
+
+    def snapshot(self):
+        return {
+            "sections": len(self.sections),
+            "terms": len(self.vocab),
+            "postings": len(self.doc_ids),
+        }
+
+
+def build_law_index(laws_dir=LAWS_DIR, path=DEFAULT_INDEX_PATH):
+    """Build the laws BM25 index from laws_json and save it to `path`"""
+    index = LexicalIndex.build(load_law_sections(laws_dir), source_signature(laws_dir))
+    index.save(path)
+    return index
+
+
+def load_law_index(laws_dir=LAWS_DIR, path=DEFAULT_INDEX_PATH):
+    """Load the saved laws BM25 index, rebuilding it when laws_json has changed"""
+    start = time.perf_counter()
+    index = None
+    if os.path.exists(path):
+        try:
+            index = LexicalIndex.load(path)
+        except Exception as e:
+            print(f"Could not read lexical index '{path}': {e}")
+    if index is None or index.signature != source_signature(laws_dir):
+        print("Building lexical (BM25) index over laws_json...")
+        index = build_law_index(laws_dir, path)
+    print(
+        f"Lexical index ready: {len(index.sections)} sections, "
+        f"{len(index.vocab)} terms in {time.perf_counter() - start:.2f}s"
+    )
+    return index
+
+
+if __name__ == "__main__":
+    index = build_law_index()
+    print(f"✅ Lexical index saved to '{DEFAULT_INDEX_PATH}' ({index.snapshot()})")
@@ -0,0 +1,350 @@
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+
+import groq
+import httpx
+from groq.types.chat import ChatCompletion, ChatCompletionChunk
+
+from llm_cache import KEY_FIELDS, cache_key, record_stream
+
+LIVE = "live"
+RECORD = "record"
+REPLAY = "replay"
+FAKE = "fake"
+
+DEFAULT_FIXTURES = os.path.join(
+    os.path.dirname(__file__), "benchmarks", "fixtures", "llm_fixtures.jsonl"
+)
+
+
+def parse_latency(spec):
+    """Latency distribution from a spec string, as a function rng -> seconds.
+
+    Specs (milliseconds): "fixed:800", "uniform:300,1500", "lognormal:800,0.5" (median,
+    sigma). "recorded" returns None, meaning replay the latency stored with a fixture.
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(x) for x in args.split(",") if x]
+    if kind == "recorded":
+        return None
+    if kind == "fixed":
+        return lambda rng: params[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1]) / 1000
+    if kind == "lognormal":
+        mu, sigma = math.log(params[0] / 1000), params[1]
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+class FixtureStore:
+    """Recorded request/response pairs, one JSON object per line, keyed like llm_cache"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def add(self, request_kwargs, response_json, latency_ms):
+        entry = {
+            "key": cache_key(request_kwargs),
+            "request": {k: request_kwargs.get(k) for k in KEY_FIELDS},
+            "response": json.loads(response_json),
+            "latency_ms": round(latency_ms, 1),
+        }
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class LiveBackend:
+    """Calls Groq (the default)"""
+
+    mode = LIVE
+
+    def __init__(self, client):
+        self.client = client
+
+    async def create(self, **kwargs):
+        return await self.client.chat.completions.create(**kwargs)
+
+    def snapshot(self):
+        return {"mode": self.mode}
+
+
+class RecordingBackend(LiveBackend):
+    """Calls Groq and appends every request/response pair to a fixture store"""
+
+    mode = RECORD
+
+    def __init__(self, client, fixtures):
+        super().__init__(client)
+        self.fixtures = fixtures
+
+    async def create(self, **kwargs):
+        start = time.perf_counter()
+        response = await super().create(**kwargs)
+
+        def save(response_json):
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.fixtures.add(kwargs, response_json, latency_ms)
+
+        if kwargs.get("stream"):
+            return record_stream(response, save)
+        save(response.model_dump_json())
+        return response
+
+    def snapshot(self):
+        return {"mode": self.mode, "fixtures": len(self.fixtures)}
+
+
+class FakeBackend:
+    """Offline stand-in for Groq: recorded responses when available, synthetic otherwise.
+
+    Latency is drawn from `latency` (or the recorded one when it is None), seeded per
+    request so the same request always takes the same time. Synthetic responses mimic
+    each pipeline stage closely enough for the endpoints to run end to end, including
+    `agent_rounds` tool calls to search_historical_cases before the agent answers.
+    """
+
+    def __init__(
+        self,
+        latency,
+        fixtures=None,
+        seed=0,
+        error_rate=0.0,
+        agent_rounds=1,
+        fallback_latency=0.8,
+    ):
+        self.mode = REPLAY if fixtures is not None else FAKE
+        self.latency = latency
+        self.fixtures = fixtures
+        self.seed = seed
+        self.error_rate = error_rate
+        self.agent_rounds = agent_rounds
+        self.fallback_latency = fallback_latency
+        self._errors = random.Random(seed)
+        self.stats = {"replayed": 0, "synthetic": 0, "injected_errors": 0}
+
+    async def create(self, **kwargs):
+        key = cache_key(kwargs)
+        rng = random.Random(f"{self.seed}:{key}")
+        entry = self.fixtures.get(key) if self.fixtures is not None else None
+
+        if entry is not None:
+            self.stats["replayed"] += 1
+            completion = ChatCompletion.model_validate(entry["response"])
+            delay = entry["latency_ms"] / 1000
+        else:
+            self.stats["synthetic"] += 1
+            completion = synthetic_completion(kwargs, self.agent_rounds)
+            delay = self.fallback_latency
+        if self.latency is not None:
+            delay = self.latency(rng)
+
+        if self.error_rate and self._errors.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            await asyncio.sleep(delay / 10)
+            raise rate_limit_error()
+
+        if kwargs.get("stream"):
+            return stream_completion(completion, delay)
+        await asyncio.sleep(delay)
+        return completion
+
+    def snapshot(self):
+        report = {"mode": self.mode, **self.stats}
+        if self.fixtures is not None:
+            report["fixtures"] = len(self.fixtures)
+        return report
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": "1"})
+    return groq.RateLimitError(
+        "Rate limit reached (injected)", response=response, body=None
+    )
+
+
+async def stream_completion(completion, delay):
+    """Stream a completion in word-sized chunks; a quarter of `delay` is time to first token"""
+    content = completion.choices[0].message.content or ""
+    pieces = re.findall(r"\S+\s*", content) or [content]
+    chunks = [pieces[i : i + 4] for i in range(0, len(pieces), 4)]
+    await asyncio.sleep(delay / 4)
+    for i, chunk in enumerate(chunks):
+        if i:
+            await asyncio.sleep(delay * 0.75 / len(chunks))
+        yield ChatCompletionChunk.model_validate(
+            {
+                "id": completion.id,
+                "object": "chat.completion.chunk",
+                "created": completion.created,
+                "model": completion.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": "".join(chunk)},
+                        "finish_reason": "stop" if i == len(chunks) - 1 else None,
+                    }
+                ],
+            }
+        )
+
+
+# --- SYNTHETIC RESPONSES ---
+# Matched on markers in the prompts main.py sends, so every stage gets an answer of
+# the right shape and a realistic size.
+
+FIR_BODY = (
+    "It is alleged that on the date mentioned the complainant was present at the place "
+    "of occurrence when the accused committed the acts described in the complaint. "
+)
+SYNTHETIC_SECTIONS = (
+    "IPC Section 379 - Theft, IPC Section 411 - Dishonestly receiving stolen property, "
+    "IPC Section 34 - Common intention, CrPC Section 154 - Information in cognizable cases"
+)
+
+
+def _synthetic_json(prompt):
+    if "plaintiff_questions" in prompt:
+        questions = [f"Question {i} about the sequence of events?" for i in range(1, 6)]
+        return {
+            "plaintiff_questions": questions,
+            "plaintiff_simulated_answers": [f"Answer {i}." for i in range(1, 6)],
+            "defendant_questions": questions,
+            "defendant_simulated_answers": [f"Denied {i}." for i in range(1, 6)],
+        }
+    if "overall_label" in prompt:
+        return {
+            "overall_label": "Fair",
+            "explanation": "The verdict follows from the charges and the facts on record.",
+        }
+    if "punishment_type" in prompt:
+        return {
+            "verdict": "Guilty",
+            "punishment_type": "Both",
+            "jail_term": "1 year",
+            "fine_amount": "Rs. 5,000",
+            "rehab_details": "None",
+            "counseling_details": "None",
+            "legal_rationale": "The offence is proved by the complainant's evidence.",
+        }
+    return {}
+
+
+def _synthetic_text(prompt):
+    if "Respond with ONLY 'VALID'" in prompt:
+        return "VALID"
+    if "guess the possible legal sections" in prompt:
+        return SYNTHETIC_SECTIONS
+    if "Legal Assessor" in prompt:
+        return "\n".join(
+            f"{s.strip()}: applies because the facts describe this offence."
+            for s in SYNTHETIC_SECTIONS.split(",")
+        )
+    if "FIRST INFORMATION REPORT" in prompt:
+        return "FIRST INFORMATION REPORT (FIR)\n\n" + FIR_BODY * 20
+    if "Charge Sheet" in prompt:
+        return "# IN THE COURT OF CHIEF JUDICIAL MAGISTRATE\n\n" + FIR_BODY * 30
+    return FIR_BODY * 4
+
+
+def synthetic_completion(request_kwargs, agent_rounds=1):
+    """A plausible ChatCompletion for one of main.py's requests"""
+    messages = request_kwargs["messages"]
+    prompt = "\n".join(str(m.get("content") or "") for m in messages)
+    message = {"role": "assistant", "content": None}
+
+    if request_kwargs.get("tools"):
+        rounds = sum(1 for m in messages if m.get("role") == "tool")
+        if rounds < agent_rounds:
+            description = re.search(r"Case Description: (.{0,80})", prompt)
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{rounds}",
+                    "type": "function",
+                    "function": {
+                        "name": "search_historical_cases",
+                        "arguments": json.dumps(
+                            {"query": description.group(1) if description else "theft"}
+                        ),
+                    },
+                }
+            ]
+        else:
+            message["content"] = "1. State v. Example (2015): " + FIR_BODY
+    elif request_kwargs.get("response_format", {}).get("type") == "json_object":
+        message["content"] = json.dumps(_synthetic_json(prompt))
+    else:
+        message["content"] = _synthetic_text(prompt)
+
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = len(message["content"] or "") // 4 + 10
+    return ChatCompletion.model_validate(
+        {
+            "id": f"fake-{cache_key(request_kwargs)[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_kwargs.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": (
+                        "tool_calls" if message.get("tool_calls") else "stop"
+                    ),
+                    "message": message,
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+    )
+
+
+def backend_from_env(make_client):
+    """Build the LLM backend selected by LLM_BACKEND (live, record, replay or fake).
+
+    `make_client()` creates the Groq client; offline modes never call it, so they run
+    without an API key.
+    """
+    mode = os.getenv("LLM_BACKEND", LIVE).lower()
+    fixtures_path = os.getenv("LLM_FIXTURES", DEFAULT_FIXTURES)
+    if mode == LIVE:
+        return LiveBackend(make_client())
+    if mode == RECORD:
+        return RecordingBackend(make_client(), FixtureStore(fixtures_path))
+    if mode in (REPLAY, FAKE):
+        default_latency = "recorded" if mode == REPLAY else "lognormal:800,0.5"
+        return FakeBackend(
+            parse_latency(os.getenv("LLM_FAKE_LATENCY", default_latency)),
+            fixtures=FixtureStore(fixtures_path) if mode == REPLAY else None,
+            seed=int(os.getenv("LLM_FAKE_SEED", "0")),
+            error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+            agent_rounds=int(os.getenv("LLM_FAKE_AGENT_ROUNDS", "1")),
+        )
+    raise ValueError(f"Unknown LLM_BACKEND: {mode!r}")
@@ -0,0 +1,261 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from groq.types.chat import ChatCompletion, ChatCompletionChunk
+
+# Request fields that change the completion. Anything else (e.g. stream) is ignored.
+KEY_FIELDS = (
+    "model",
+    "messages",
+    "temperature",
+    "response_format",
+    "max_tokens",
+    "tools",
+    "tool_choice",
+)
+
+
+def cache_key(request_kwargs):
+    """Content address of a chat completion request"""
+    payload = {k: request_kwargs.get(k) for k in KEY_FIELDS}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Two-tier cache of serialized chat completions.
+
+    Tier 1 is an in-process LRU with TTL. Tier 2 is an optional SQLite file that can be
+    shared by several uvicorn workers on the same host.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        # key -> Future, so identical concurrent calls share one upstream request
+        self._inflight = {}
+        self.stats = {}  # endpoint -> {"memory_hits", "disk_hits", "misses"}
+
+        if db_path:
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    def _count(self, endpoint, field):
+        counters = self.stats.setdefault(
+            endpoint, {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        )
+        counters[field] += 1
+
+    def get(self, key, endpoint="default"):
+        """Return the cached JSON for `key`, or None"""
+        value = self._from_memory(key, endpoint)
+        if value is None and self.db_path:
+            value = self._from_disk(key, endpoint)
+        if value is None:
+            self._miss(endpoint)
+        return value
+
+    async def aget(self, key, endpoint="default"):
+        """get() for the event loop: the SQLite tier is read on a worker thread"""
+        value = self._from_memory(key, endpoint)
+        if value is None and self.db_path:
+            value = await asyncio.to_thread(self._from_disk, key, endpoint)
+        if value is None:
+            self._miss(endpoint)
+        return value
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self.db_path:
+            self._to_disk(key, value, expires_at)
+
+    async def aput(self, key, value):
+        """put() for the event loop: the SQLite tier is written on a worker thread"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self.db_path:
+            await asyncio.to_thread(self._to_disk, key, value, expires_at)
+
+    def _from_memory(self, key, endpoint):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > time.time():
+                self._memory.move_to_end(key)
+                self._count(endpoint, "memory_hits")
+                return entry[1]
+            if entry:
+                del self._memory[key]
+        return None
+
+    def _from_disk(self, key, endpoint):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row and row[1] > time.time():
+            self._remember(key, row[0], row[1])
+            with self._lock:
+                self._count(endpoint, "disk_hits")
+            return row[0]
+        return None
+
+    def _to_disk(self, key, value, expires_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+
+    def _miss(self, endpoint):
+        with self._lock:
+            self._count(endpoint, "misses")
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def snapshot(self):
+        """Hit/miss counters per endpoint, plus the overall hit rate"""
+        with self._lock:
+            per_endpoint = {k: dict(v) for k, v in self.stats.items()}
+            size = len(self._memory)
+        hits = sum(v["memory_hits"] + v["disk_hits"] for v in per_endpoint.values())
+        lookups = hits + sum(v["misses"] for v in per_endpoint.values())
+        return {
+            "entries": size,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "endpoints": per_endpoint,
+        }
+
+
+async def cached_create(cache, create, endpoint, **kwargs):
+    """Call `create(**kwargs)` through the cache.
+
+    Non-streaming calls return a ChatCompletion. Streaming calls (stream=True) replay a hit
+    as a single chunk, and store a miss once the stream has been fully consumed.
+    """
+    key = cache_key(kwargs)
+    cached = await cache.aget(key, endpoint)
+
+    if kwargs.get("stream"):
+        if cached is not None:
+            return replay_as_stream(ChatCompletion.model_validate_json(cached))
+        return record_stream(await create(**kwargs), functools.partial(cache.aput, key))
+
+    if cached is not None:
+        return ChatCompletion.model_validate_json(cached)
+
+    # Single-flight: identical requests already in progress share one upstream call
+    inflight = cache._inflight.get(key)
+    if inflight is not None:
+        try:
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise
+            return await create(**kwargs)  # the leading call was cancelled
+
+    future = asyncio.get_running_loop().create_future()
+    cache._inflight[key] = future
+    try:
+        completion = await create(**kwargs)
+        await cache.aput(key, completion.model_dump_json())
+        future.set_result(completion)
+        return completion
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        cache._inflight.pop(key, None)
+
+
+async def replay_as_stream(completion):
+    """Serve a complete ChatCompletion as a one-chunk completion stream"""
+    message = completion.choices[0].message
+    yield ChatCompletionChunk.model_validate(
+        {
+            "id": completion.id,
+            "object": "chat.completion.chunk",
+            "created": completion.created,
+            "model": completion.model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": message.content},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+    )
+
+
+async def record_stream(stream, on_complete):
+    """Pass a completion stream through; once consumed, call `on_complete` with its JSON.
+
+    `on_complete` may be a coroutine function; it is then awaited.
+    """
+    parts = []
+    first = None
+    async for chunk in stream:
+        first = first or chunk
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+        yield chunk
+
+    if first is not None:
+        completion = ChatCompletion.model_validate(
+            {
+                "id": first.id,
+                "object": "chat.completion",
+                "created": first.created,
+                "model": first.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": "".join(parts)},
+                    }
+                ],
+            }
+        )
+        done = on_complete(completion.model_dump_json())
+        if inspect.isawaitable(done):
+            await done
+
+
+def cache_from_env():
+    """Build the process-wide cache from LLM_CACHE_* settings (None when disabled)"""
+    if os.getenv("LLM_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    return LLMCache(
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512")),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", "3600")),
+        db_path=os.getenv("LLM_CACHE_DB") or None,
+    )
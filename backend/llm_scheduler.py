@@ -0,0 +1,343 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import time
+from contextvars import ContextVar
+
+import groq
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# Priority class for LLM calls made in the current task; None lets the endpoint decide
+llm_priority = ContextVar("llm_priority", default=None)
+
+# Worth another attempt: 429s, 5xx responses, timeouts and dropped connections
+RETRYABLE = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+# Completion budget assumed for calls that do not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+
+
+async def with_priority(priority, awaitable):
+    """Await `awaitable` with its LLM calls scheduled in the given priority class"""
+    token = llm_priority.set(priority)
+    try:
+        return await awaitable
+    finally:
+        llm_priority.reset(token)
+
+
+def estimate_tokens(request_kwargs):
+    """Rough token cost of a request (~4 chars per token) plus its completion budget"""
+    chars = sum(len(str(m.get("content") or "")) for m in request_kwargs["messages"])
+    if request_kwargs.get("tools"):
+        chars += len(json.dumps(request_kwargs["tools"]))
+    completion = request_kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // 4 + completion
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, with a burst of one minute's worth"""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 when they are now)"""
+        self._refill()
+        # Requests larger than the whole bucket wait for a full bucket
+        amount = min(amount, self.per_minute)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        """Spend `amount` units; a negative amount refunds an over-estimate"""
+        self._refill()
+        self.level = min(self.per_minute, self.level - amount)
+
+
+class ModelBudget:
+    """Request and token buckets of one model, plus its Retry-After pause"""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.paused_until = 0.0
+
+    def wait_time(self, tokens):
+        """Seconds until a call of `tokens` can be admitted (0 when it can be now)"""
+        waits = [self.paused_until - time.monotonic()]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(waits)
+
+    def take(self, tokens):
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def snapshot(self):
+        return {
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "requests_available": (
+                round(self.requests.level, 1) if self.requests else None
+            ),
+            "tokens_available": round(self.tokens.level) if self.tokens else None,
+        }
+
+
+class LLMScheduler:
+    """Admission control for chat completions against the provider's rate limits.
+
+    The provider enforces its limits per model, so each model gets its own requests-
+    per-minute and tokens-per-minute buckets (`rpm` / `tpm`, or its entry in
+    `limits`), created on first use. Calls wait in a priority queue until their
+    model's buckets can cover them, so interactive work is admitted ahead of batch
+    work and one model's backlog never holds up another's. Rate-limit and server
+    errors are retried with jittered exponential backoff; a Retry-After from the
+    provider pauses admission for every caller of that model.
+
+    `in_flight` counts calls awaiting the provider; a streaming call stays in flight
+    until its stream is consumed or closed.
+    """
+
+    def __init__(
+        self,
+        create,
+        rpm=30,
+        tpm=12000,
+        limits=None,
+        max_retries=4,
+        base_delay=1.0,
+        max_delay=30.0,
+    ):
+        self._create = create
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = limits or {}  # model -> (rpm, tpm)
+        self.budgets = {}  # model -> ModelBudget
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._queue = []  # heap of (priority, seq, budget, estimated tokens, future)
+        self._seq = itertools.count()
+        self._loop = None
+        self._wakeup = None
+        self._dispatcher = None
+        self.in_flight = 0
+        self.stats = {
+            name: {
+                "dispatched": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "failed": 0,
+                "wait_seconds": 0.0,
+            }
+            for name in PRIORITY_NAMES.values()
+        }
+
+    async def create(self, priority=INTERACTIVE, **kwargs):
+        """Run `create(**kwargs)` once admitted, retrying transient provider errors"""
+        counters = self.stats[PRIORITY_NAMES[priority]]
+        estimate = estimate_tokens(kwargs)
+        budget = self._budget(kwargs.get("model"))
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority, budget, estimate)
+            self.in_flight += 1
+            response = None
+            try:
+                response = await self._create(**kwargs)
+            except RETRYABLE as e:
+                if isinstance(e, groq.RateLimitError):
+                    counters["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    counters["failed"] += 1
+                    raise
+                counters["retries"] += 1
+                await asyncio.sleep(self._backoff(e, attempt, budget))
+                continue
+            except Exception:
+                counters["failed"] += 1
+                raise
+            finally:
+                if response is None or not kwargs.get("stream"):
+                    self.in_flight -= 1
+
+            if kwargs.get("stream"):
+                return self._in_flight_until_consumed(response)
+            usage = getattr(response, "usage", None)
+            if budget.tokens is not None and usage is not None:
+                budget.tokens.take(usage.total_tokens - estimate)
+            return response
+
+    async def _in_flight_until_consumed(self, stream):
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self.in_flight -= 1
+
+    def _budget(self, model):
+        budget = self.budgets.get(model)
+        if budget is None:
+            rpm, tpm = self.limits.get(model, (self.rpm, self.tpm))
+            budget = self.budgets[model] = ModelBudget(rpm, tpm)
+        return budget
+
+    def _backoff(self, error, attempt, budget):
+        """Full-jitter exponential delay, stretched to any Retry-After the provider sent"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        response = getattr(error, "response", None)
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (AttributeError, TypeError, ValueError):
+            return delay
+        budget.paused_until = max(budget.paused_until, time.monotonic() + retry_after)
+        return retry_after + delay
+
+    def _admit(self, priority, budget, tokens):
+        budget.take(tokens)
+        self.stats[PRIORITY_NAMES[priority]]["dispatched"] += 1
+
+    async def _acquire(self, priority, budget, tokens):
+        queued = any(entry[2] is budget for entry in self._queue)
+        if not queued and budget.wait_time(tokens) <= 0:
+            # fast path: nobody waiting for this model, budget available
+            self._admit(priority, budget, tokens)
+            return
+
+        self._ensure_dispatcher()
+        future = self._loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), budget, tokens, future))
+        self._wakeup.set()
+        start = time.monotonic()
+        try:
+            # Cancelling the caller cancels the future, and the dispatcher skips it
+            await future
+        finally:
+            self.stats[PRIORITY_NAMES[priority]]["wait_seconds"] += (
+                time.monotonic() - start
+            )
+
+    def _ensure_dispatcher(self):
+        loop = asyncio.get_running_loop()
+        if (
+            self._loop is not loop
+            or self._dispatcher is None
+            or self._dispatcher.done()
+        ):
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    def _next_admissible(self):
+        """Pop the first queued call whose model can be admitted now.
+
+        Returns (entry, None), or (None, seconds until one might be). Calls are
+        considered in priority order, and only the first waiter of each model, so a
+        model's calls keep their order while another model's budget is exhausted.
+        """
+        self._queue = [entry for entry in self._queue if not entry[4].done()]
+        wait, blocked = None, set()
+        for entry in sorted(self._queue):
+            budget = entry[2]
+            if budget in blocked:
+                continue
+            budget_wait = budget.wait_time(entry[3])
+            if budget_wait <= 0:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                return entry, None
+            blocked.add(budget)
+            wait = budget_wait if wait is None else min(wait, budget_wait)
+        heapq.heapify(self._queue)
+        return None, wait
+
+    async def _dispatch(self):
+        while True:
+            entry, wait = self._next_admissible()
+            if entry is None:
+                # Sleep until a budget refills, or re-check when a new call arrives
+                # (it may outrank the waiting ones, or be for another model)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            priority, _, budget, tokens, future = entry
+            self._admit(priority, budget, tokens)
+            future.set_result(None)
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+    def snapshot(self):
+        """Queue depth per priority class, in-flight calls, bucket levels and counters"""
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, _, future in self._queue:
+            if not future.done():
+                queued[PRIORITY_NAMES[priority]] += 1
+        classes = {}
+        for name, counters in self.stats.items():
+            classes[name] = {
+                **counters,
+                "wait_seconds": round(counters["wait_seconds"], 3),
+                "avg_wait_ms": (
+                    round(1000 * counters["wait_seconds"] / counters["dispatched"], 1)
+                    if counters["dispatched"]
+                    else 0.0
+                ),
+            }
+        return {
+            "queued": queued,
+            "in_flight": self.in_flight,
+            "models": {
+                model: budget.snapshot() for model, budget in self.budgets.items()
+            },
+            "classes": classes,
+        }
+
+
+def _parse_limits(value):
+    """Parse "model=rpm/tpm,model=rpm/tpm" into {model: (rpm, tpm)}"""
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            model, budget = item.split("=", 1)
+            rpm, tpm = budget.split("/", 1)
+            limits[model.strip()] = (int(rpm), int(tpm))
+    return limits
+
+
+def scheduler_from_env(create):
+    """Build the process-wide scheduler from LLM_* rate limit settings"""
+    return LLMScheduler(
+        create,
+        rpm=int(os.getenv("LLM_RPM", "30")),
+        tpm=int(os.getenv("LLM_TPM", "12000")),
+        limits=_parse_limits(os.getenv("LLM_MODEL_LIMITS", "")),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+        base_delay=float(os.getenv("LLM_BACKOFF_BASE", "1.0")),
+        max_delay=float(os.getenv("LLM_BACKOFF_MAX", "30.0")),
+    )
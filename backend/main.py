@@ -1,15 +1,83 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
 from pydantic import BaseModel
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 import json
-from groq import Groq
+from groq import AsyncGroq, RateLimitError, InternalServerError, APIConnectionError
+from llm_backend import backend_from_env
+from llm_cache import cache_from_env, cached_create
+from model_router import router_from_env
+from llm_scheduler import (
+    INTERACTIVE,
+    BATCH,
+    llm_priority,
+    with_priority,
+    scheduler_from_env,
+)
+from semantic_cache import semantic_cache_from_env
+from case_index import CATEGORIES, case_filter
+from citations import parse_citations
+import metrics
+from metrics import current_endpoint, current_trace, span, record_tokens
+from precheck import VALID, INVALID, AMBIGUOUS, classify_description
+from jobs import JobStore, JobRunner, QUEUED, CANCELLED
+from sessions import CaseSessionStore
 from models import *
 
 load_dotenv()
 
-app = FastAPI(title="Lawgorithm API")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the embedding model and vector DBs off the import path; /ready turns
+    # ready once this has finished
+    warmup_task = asyncio.create_task(run_in_retrieval_pool(utils.warmup))
+    # Background workers for /api/jobs (defined at the bottom of this module)
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    await llm_scheduler.close()
+    await asyncio.gather(warmup_task, return_exceptions=True)
+
+
+app = FastAPI(title="Lawgorithm API", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Label spans with the matched route and report them in a Server-Timing header"""
+    endpoint = next(
+        (r.path for r in app.routes if r.matches(request.scope)[0] == Match.FULL),
+        "other",
+    )
+    trace = []
+    endpoint_token = current_endpoint.set(endpoint)
+    trace_token = current_trace.set(trace)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = metrics.server_timing(
+            trace, time.perf_counter() - start
+        )
+        return response
+    finally:
+        metrics.HTTP_SECONDS.observe(
+            time.perf_counter() - start,
+            endpoint=endpoint,
+            method=request.method,
+            status=status,
+        )
+        current_endpoint.reset(endpoint_token)
+        current_trace.reset(trace_token)
+
 
 # CORS setup
 app.add_middleware(
@@ -20,113 +88,416 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Groq Client
+# Groq Client (async, so a slow completion never blocks the event loop)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     print("Warning: GROQ_API_KEY not found in environment variables.")
 
-client = Groq(api_key=GROQ_API_KEY)
+# LLM backend (see llm_backend.py): LLM_BACKEND=live calls Groq, record also saves
+# fixtures, replay/fake answer offline. Only live and record create a Groq client;
+# retries are left to the scheduler below, which backs off across all callers.
+llm_backend = backend_from_env(lambda: AsyncGroq(api_key=GROQ_API_KEY, max_retries=0))
+
+# Model tiers (see model_router.py): cheap stages (pre-check, section guess,
+# questionnaire) go to a small fast model, the rest to the large one. A tier whose
+# recent latency or error rate crosses its limit hands its stages to the other tier.
+model_router = router_from_env()
+
+# Rate-limit-aware admission (see llm_scheduler.py): RPM/TPM token buckets, priority
+# classes and jittered backoff on 429/5xx. Calls from /api/jobs, the batch endpoints
+# and LLM_BATCH_ENDPOINTS run in the batch class, behind interactive requests.
+llm_scheduler = scheduler_from_env(model_router.track(llm_backend.create))
+LLM_BATCH_ENDPOINTS = set(
+    os.getenv("LLM_BATCH_ENDPOINTS", "analyze_fairness").split(",")
+)
 
-from utils import load_semantic_model, get_relevant_sections, get_relevant_cases
+# Content-addressed completion cache (see llm_cache.py). A call is cached when its
+# endpoint opts in through LLM_CACHE_ENDPOINTS or its stage through LLM_CACHE_STAGES.
+# By default only the near-deterministic stages (temperature 0-0.1) are cached; the
+# sampled drafts are not unless an operator opts them in. Streaming calls are cached
+# too and replayed as one chunk.
+llm_cache = cache_from_env()
+LLM_CACHE_ENDPOINTS = set(filter(None, os.getenv("LLM_CACHE_ENDPOINTS", "").split(",")))
+LLM_CACHE_STAGES = set(
+    filter(
+        None,
+        os.getenv("LLM_CACHE_STAGES", "precheck,guess,verification,agent").split(","),
+    )
+)
 
-# Load ChromaDB connections into memory on startup
-load_semantic_model()
 
+async def create_completion(endpoint, stage="completion", **kwargs):
+    """Single entry point for Groq chat completions made by the API endpoints.
 
-@app.post("/api/generate_fir")
-async def generate_fir(request: FIRRequest):
-    try:
-        # Construct the prompt based on user requirements
-        complainant_info = f"Name: {request.complainant.name}, Address: {request.complainant.address}, Contact: {request.complainant.contact}"
-        accused_info = f"Name: {request.accused.name if request.accused else 'Unknown person(s)'}, Address: {request.accused.address if request.accused else 'Not provided'}"
-
-        # New Official Info
-        official_info = f"""
-        Police Station: {request.police_station}
-        FIR Number: {request.fir_number}
-        Registration Date: {request.registration_date}
-        Investigating Officer: {request.officer_name} ({request.officer_rank})
-        """
+    `stage` picks the model tier (unless `model` is given) and labels the call's
+    latency and token metrics. Cache hits skip the scheduler and are not timed.
+    Provider errors that outlast the retries surface as 503 (rate limited) or 502
+    (provider unavailable) instead of a generic 500.
+    """
+    priority = llm_priority.get()
+    if priority is None:
+        priority = BATCH if endpoint in LLM_BATCH_ENDPOINTS else INTERACTIVE
+    kwargs.setdefault("model", model_router.route(stage))
 
-        # --- STEP 0: PRE-CHECK VALIDATION ---
-        check_prompt = f"""
-        Evaluate this case description text. Is it a meaningful (even if brief) description of a criminal incident, dispute, or legal case?
-        Or is it gibberish, meaninglessly short, or entirely irrelevant?
-        
-        Text: "{request.case_description}"
-        
-        Respond with ONLY 'VALID' if it is meaningful enough to process, or 'INVALID' if it is gibberish/not a case. No other words.
-        """
+    async def create(**kw):
+        with span("llm", stage):
+            completion = await llm_scheduler.create(priority, **kw)
+        record_tokens(stage, getattr(completion, "usage", None))
+        return completion
 
-        check_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": check_prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.0,
-            max_tokens=10,
+    try:
+        if llm_cache is not None and (
+            endpoint in LLM_CACHE_ENDPOINTS or stage in LLM_CACHE_STAGES
+        ):
+            return await cached_create(llm_cache, create, endpoint, **kwargs)
+        return await create(**kwargs)
+    except RateLimitError:
+        raise HTTPException(
+            status_code=503,
+            detail="The LLM provider is rate limiting requests. Please retry shortly.",
         )
-        if "INVALID" in check_completion.choices[0].message.content.upper():
+    except (InternalServerError, APIConnectionError) as e:
+        raise HTTPException(status_code=502, detail=f"LLM provider unavailable: {e}")
+
+
+import utils
+from utils import (
+    run_in_retrieval_pool,
+    asearch_sections,
+    merge_section_hits,
+    format_section_hits,
+    format_case_hits,
+    asearch_cases_batch,
+    aembed_query,
+    amax_corpus_similarity,
+)
+
+# FIR pre-check: "local" answers clear-cut inputs without the LLM, "llm" always asks it
+PRECHECK_MODE = os.getenv("PRECHECK_MODE", "local")
+
+
+# --- SEMANTIC RESULT CACHE (see semantic_cache.py) ---
+# Near-duplicate case descriptions (whitespace, punctuation, changed names) reuse the
+# verified sections / precedents computed for an earlier submission.
+semantic_cache = semantic_cache_from_env()
+
+
+async def semantic_lookup(stage, text, context=None):
+    """Embed `text` and look it up for `stage` among entries stored with `context`.
+
+    Returns (payload or None, embedding).
+    """
+    if semantic_cache is None:
+        return None, None
+    embedding = await aembed_query(text)
+    if embedding is None:
+        return None, None
+    return semantic_cache.lookup(stage, embedding, context), embedding
+
+
+def semantic_store(stage, embedding, payload, context=None):
+    """Remember a stage result for the description that produced `embedding`"""
+    if semantic_cache is not None and embedding is not None:
+        semantic_cache.store(stage, embedding, payload, context)
+
+
+# --- CASE SESSIONS (see sessions.py) ---
+# generate_fir opens a session and returns its case_id. Later stages accept the id in
+# place of the FIR / charge sheet text, and each stage stores its artifacts back, so
+# intermediate results such as the verified sections are reused downstream.
+case_sessions = CaseSessionStore(
+    os.getenv(
+        "CASE_SESSIONS_DB",
+        os.path.join(os.path.dirname(__file__), "case_sessions.sqlite3"),
+    ),
+    ttl_seconds=float(os.getenv("CASE_SESSION_TTL", "604800")),
+)
+
+
+async def resolve_case(request, *required):
+    """Merge a stage request over its case session.
+
+    Fields sent in the request win over stored artifacts. Raises 404 for an unknown or
+    expired case_id and 400 when a `required` field is in neither.
+    """
+    case = {}
+    if request.case_id:
+        case = await asyncio.to_thread(case_sessions.get, request.case_id)
+        if case is None:
             raise HTTPException(
-                status_code=400,
-                detail="The case description provided is too vague, short, or meaningless. Please provide a clear, detailed description of the incident.",
+                status_code=404, detail="Case session not found or expired."
             )
+    case.update(
+        {
+            k: v
+            for k, v in request.model_dump(exclude={"case_id"}).items()
+            if v is not None
+        }
+    )
+    missing = [field for field in required if case.get(field) is None]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Provide a case_id or these fields: {', '.join(missing)}.",
+        )
+    return case
 
-        # --- STEP 1: AGENT GUESSES POSSIBLE SECTIONS ---
-        guess_prompt = f"""
-        Based on the following case description, act as a legal expert and guess the possible legal sections from the Indian Penal Code (IPC),CPC,HMA,IDA,IEA,MVA,NIA and Code of Criminal Procedure (CrPC).
-        List the section numbers and a brief keyword for each. This will be used to fetch vectors from a database.
-        
-        Case Description: "{request.case_description}"
-        
-        Respond ONLY with a comma-separated list of guessed sections and keywords (e.g. IPC Section 378 - Theft, IPC Section 379, CrPC Section 154).
-        """
 
-        guess_completion = client.chat.completions.create(
+async def save_case(case_id, **artifacts):
+    """Store stage artifacts in the case session (no-op for requests without a case_id)"""
+    if case_id:
+        await asyncio.to_thread(case_sessions.update, case_id, artifacts)
+
+
+# --- STAGED PIPELINES & SERVER-SENT EVENTS ---
+# Document endpoints are written as async generators yielding (stage, info) progress
+# events and finishing with ("draft", kwargs) for the final completion, so the same
+# pipeline backs both the JSON endpoint and its streaming variant.
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def run_pipeline(pipeline):
+    """Drain a staged pipeline. Returns (draft kwargs, merged info of the progress events)."""
+    progress = {}
+    async for stage, info in pipeline:
+        if stage == "draft":
+            return info, progress
+        progress.update(info)
+
+
+def sse_event(event, data):
+    """Encode one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_document(pipeline, endpoint, result_key, on_done=None):
+    """Relay pipeline progress as SSE, then stream the drafted document token by token.
+
+    The coroutine `on_done(progress, document)` may persist the result; the dict it
+    returns is added to the final "done" event.
+    """
+    try:
+        progress = {}
+        async for stage, info in pipeline:
+            if stage == "draft":
+                draft_kwargs = info
+            else:
+                progress.update(info)
+                yield sse_event("stage", {"stage": stage, **info})
+
+        yield sse_event("stage", {"stage": "drafting"})
+        stream = await create_completion(
+            endpoint, stage="draft", **draft_kwargs, stream=True
+        )
+
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield sse_event("token", {"text": chunk.choices[0].delta.content})
+
+        document = "".join(parts)
+        extra = await on_done(progress, document) if on_done else {}
+        yield sse_event("done", {result_key: document, **extra})
+
+    except HTTPException as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+    except Exception as e:
+        print(f"Error streaming {endpoint}: {str(e)}")
+        yield sse_event("error", {"status_code": 500, "detail": str(e)})
+
+
+async def precheck_description(case_description, embedding=None, model=None):
+    """STEP 0: PRE-CHECK VALIDATION. Returns VALID or INVALID.
+
+    A local classifier (precheck.py) settles clear-cut inputs in milliseconds; only the
+    ambiguous middle band costs an LLM round trip. PRECHECK_MODE=llm always asks the LLM.
+    `model` overrides the stage's routed model.
+    """
+    if PRECHECK_MODE != "llm":
+        similarity = await amax_corpus_similarity(case_description, embedding)
+        verdict = classify_description(case_description, similarity)
+        print(f"Local pre-check: {verdict} (max similarity: {similarity})")
+        if verdict != AMBIGUOUS:
+            return verdict
+
+    check_prompt = f"""
+    Evaluate this case description text. Is it a meaningful (even if brief) description of a criminal incident, dispute, or legal case?
+    Or is it gibberish, meaninglessly short, or entirely irrelevant?
+    
+    Text: "{case_description}"
+    
+    Respond with ONLY 'VALID' if it is meaningful enough to process, or 'INVALID' if it is gibberish/not a case. No other words.
+    """
+
+    check_completion = await create_completion(
+        "generate_fir",
+        stage="precheck",
+        messages=[{"role": "user", "content": check_prompt}],
+        temperature=0.0,
+        max_tokens=10,
+        **({"model": model} if model else {}),
+    )
+    if "INVALID" in check_completion.choices[0].message.content.upper():
+        return INVALID
+    return VALID
+
+
+async def verified_sections_stages(request: FIRRequest, embedding=None):
+    """FIR steps 0-3: pre-check, section guess, retrieval and verification.
+
+    Yields (stage, info) progress events; the "guess" and "verification" events carry
+    `guessed_sections` and `relevant_laws`. `embedding` is the description's query
+    embedding when already computed.
+    """
+    # --- STEP 1: AGENT GUESSES POSSIBLE SECTIONS ---
+    guess_prompt = f"""
+    Based on the following case description, act as a legal expert and guess the possible legal sections from the Indian Penal Code (IPC),CPC,HMA,IDA,IEA,MVA,NIA and Code of Criminal Procedure (CrPC).
+    List the section numbers and a brief keyword for each. This will be used to fetch vectors from a database.
+    
+    Case Description: "{request.case_description}"
+    
+    Respond ONLY with a comma-separated list of guessed sections and keywords (e.g. IPC Section 378 - Theft, IPC Section 379, CrPC Section 154).
+    """
+
+    # --- STEPS 0-2 RUN SPECULATIVELY IN PARALLEL ---
+    # The pre-check, the section guess and a first-pass retrieval on the raw
+    # description only depend on the case description, so start them together
+    # and cancel the speculative work if the pre-check rejects the input.
+    check_task = asyncio.create_task(
+        precheck_description(request.case_description, embedding)
+    )
+    guess_task = asyncio.create_task(
+        create_completion(
+            "generate_fir",
+            stage="guess",
             messages=[{"role": "user", "content": guess_prompt}],
-            model="llama-3.3-70b-versatile",
             temperature=0.1,
             max_tokens=100,
         )
-        guessed_sections = guess_completion.choices[0].message.content
-        print(f"Guessed Sections: {guessed_sections}")
-
-        # --- STEP 2: FETCH VECTORS BASED ON USER INPUTS & GUESSED SECTIONS ---
-        search_query = f"{request.case_description} {guessed_sections}"
-        fetched_relevant_sections_raw = get_relevant_sections(search_query, limit=10)
-        print(
-            f"Fetched Sections context size: {len(fetched_relevant_sections_raw)} chars"
-        )
+    )
+    raw_hits_task = asyncio.create_task(
+        asearch_sections(request.case_description, limit=10, embedding=embedding)
+    )
 
-        # --- STEP 3: VERIFICATION AND MODIFICATION ---
-        verification_prompt = f"""
-        You are an expert Indian Legal Assessor and Judicial Officer.
-        You have been given a user case description, guessed sections from an AI assistant, and fetched legal section texts from a database.
-        
-        Your task is to verify if the fetched sections and guessed sections are TRULY related to the case.
-        - If the fetched sections are related, select the most relevant ones.
-        - If they are NOT related, or crucial sections are missing, you MUST modify the results and include the correct sections from your own knowledge of IPC and CrPC.
-        
-        Case Description: "{request.case_description}"
-        
-        Guessed Sections from AI assistant: 
-        {guessed_sections}
-        
-        Fetched Sections from DB:
-        {fetched_relevant_sections_raw}
-        
-        Output ONLY the final list of the 3-5 most specific, confirmed relevant sections. 
-        Format cleanly with the section title and a 1-sentence explanation of why it precisely applies to the facts of the case. No conversational filler.
-        """
+    try:
+        if await check_task == INVALID:
+            raise HTTPException(
+                status_code=400,
+                detail="The case description provided is too vague, short, or meaningless. Please provide a clear, detailed description of the incident.",
+            )
+        yield "precheck", {"result": "VALID"}
 
-        verification_completion = client.chat.completions.create(
-            messages=[{"role": "user", "content": verification_prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.1,
-            max_tokens=1500,
+        guess_completion = await guess_task
+        guessed_sections = guess_completion.choices[0].message.content
+        print(f"Guessed Sections: {guessed_sections}")
+        yield "guess", {"guessed_sections": guessed_sections}
+
+        # --- STEP 2: MERGE GUESSED-SECTION HITS INTO THE RAW RETRIEVAL ---
+        guessed_hits = await asearch_sections(guessed_sections, limit=10)
+        raw_hits = await raw_hits_task
+    finally:
+        for task in (check_task, guess_task, raw_hits_task):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # already surfaced through check_task, or moot
+
+    merged_hits = merge_section_hits(raw_hits, guessed_hits, limit=10)
+    fetched_relevant_sections_raw = format_section_hits(merged_hits)
+    print(f"Fetched Sections context size: {len(fetched_relevant_sections_raw)} chars")
+    yield "retrieval", {"sections": len(merged_hits)}
+
+    # --- STEP 3: VERIFICATION AND MODIFICATION ---
+    verification_prompt = f"""
+    You are an expert Indian Legal Assessor and Judicial Officer.
+    You have been given a user case description, guessed sections from an AI assistant, and fetched legal section texts from a database.
+    
+    Your task is to verify if the fetched sections and guessed sections are TRULY related to the case.
+    - If the fetched sections are related, select the most relevant ones.
+    - If they are NOT related, or crucial sections are missing, you MUST modify the results and include the correct sections from your own knowledge of IPC and CrPC.
+    
+    Case Description: "{request.case_description}"
+    
+    Guessed Sections from AI assistant: 
+    {guessed_sections}
+    
+    Fetched Sections from DB:
+    {fetched_relevant_sections_raw}
+    
+    Output ONLY the final list of the 3-5 most specific, confirmed relevant sections. 
+    Format cleanly with the section title and a 1-sentence explanation of why it precisely applies to the facts of the case. No conversational filler.
+    """
+
+    verification_completion = await create_completion(
+        "generate_fir",
+        stage="verification",
+        messages=[{"role": "user", "content": verification_prompt}],
+        temperature=0.1,
+        max_tokens=1500,
+    )
+
+    relevant_laws = verification_completion.choices[0].message.content
+    print(f"Verified Context injected: {len(relevant_laws)} chars")
+    yield "verification", {"relevant_laws": relevant_laws}
+
+
+async def fir_pipeline(request: FIRRequest):
+    """Run the FIR stages before drafting (pre-check, guess, retrieval, verification).
+
+    Yields (stage, info) progress events as each stage completes. The last event is
+    ("draft", kwargs) carrying the arguments for the final drafting completion. Steps 0-3
+    are skipped when the semantic cache holds a near-duplicate case description.
+    """
+    # Construct the prompt based on user requirements
+    complainant_info = f"Name: {request.complainant.name}, Address: {request.complainant.address}, Contact: {request.complainant.contact}"
+    accused_info = f"Name: {request.accused.name if request.accused else 'Unknown person(s)'}, Address: {request.accused.address if request.accused else 'Not provided'}"
+
+    # New Official Info
+    official_info = f"""
+    Police Station: {request.police_station}
+    FIR Number: {request.fir_number}
+    Registration Date: {request.registration_date}
+    Investigating Officer: {request.officer_name} ({request.officer_rank})
+    """
+
+    # --- SEMANTIC CACHE: REUSE SECTIONS VERIFIED FOR A NEAR-DUPLICATE CASE ---
+    cached, embedding = await semantic_lookup("fir_sections", request.case_description)
+    if cached:
+        guessed_sections = cached["guessed_sections"]
+        relevant_laws = cached["relevant_laws"]
+        yield "guess", {"guessed_sections": guessed_sections, "cached": True}
+        yield "verification", {"relevant_laws": relevant_laws, "cached": True}
+    else:
+        results = {}
+        async for stage, info in verified_sections_stages(request, embedding):
+            results.update(info)
+            yield stage, info
+        guessed_sections = results["guessed_sections"]
+        relevant_laws = results["relevant_laws"]
+        semantic_store(
+            "fir_sections",
+            embedding,
+            {"guessed_sections": guessed_sections, "relevant_laws": relevant_laws},
         )
 
-        relevant_laws = verification_completion.choices[0].message.content
-        print(f"Verified Context injected: {len(relevant_laws)} chars")
-        system_prompt = f"""You are an expert Indian Police Officer and Legal Drafting Assistant with deep knowledge of the Indian Penal Code (IPC), CrPC, Motor Vehicles Act (MVA), and other standard Indian Laws.
+    # --- CASE SESSION: LATER STAGES REFER TO THIS CASE BY ID ---
+    case_id = await asyncio.to_thread(
+        case_sessions.create,
+        {
+            "case_description": request.case_description,
+            "police_station": request.police_station,
+            "officer_name": request.officer_name,
+            "officer_rank": request.officer_rank,
+            "accused_name": request.accused.name if request.accused else None,
+            "guessed_sections": guessed_sections,
+            "relevant_laws": relevant_laws,
+        },
+    )
+    yield "session", {"case_id": case_id}
+
+    system_prompt = f"""You are an expert Indian Police Officer and Legal Drafting Assistant with deep knowledge of the Indian Penal Code (IPC), CrPC, Motor Vehicles Act (MVA), and other standard Indian Laws.
 
 Your task is to convert informal user-provided case details into a legally structured First Information Report (FIR).
 
@@ -182,7 +553,7 @@ MANDATORY DISCLAIMER (MUST BE INCLUDED AT THE END):
 IMPORTANT: Generate the output strictly in English.
 """
 
-        user_content = f"""
+    user_content = f"""
 Input Details:
 1. CONSTANT DETAILS (Use these exactly):
 {official_info}
@@ -193,25 +564,126 @@ Input Details:
 5. Date/Time/Place Note: {request.date_time_place}
 """
 
-        completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
+    yield "draft", {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ],
+        "temperature": 0.3,
+    }
+
+
+async def finish_fir(progress, fir):
+    """Store the drafted FIR in the session opened by fir_pipeline"""
+    await save_case(progress["case_id"], fir_content=fir)
+    return {"case_id": progress["case_id"]}
+
+
+@app.post("/api/generate_fir")
+async def generate_fir(request: FIRRequest):
+    try:
+        draft_kwargs, progress = await run_pipeline(fir_pipeline(request))
+        completion = await create_completion(
+            "generate_fir", stage="draft", **draft_kwargs
         )
 
         generated_fir = completion.choices[0].message.content
-        return {"fir": generated_fir}
+        return {"fir": generated_fir, **(await finish_fir(progress, generated_fir))}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating FIR: {str(e)}")  # Log the error
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/generate_fir/stream")
+async def generate_fir_stream(request: FIRRequest):
+    """SSE variant of generate_fir: stage progress events, then the FIR token by token"""
+    return StreamingResponse(
+        stream_document(fir_pipeline(request), "generate_fir", "fir", finish_fir),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+# --- BATCH FIR GENERATION ---
+# Stations register FIRs in bulk at shift change. Cases share the process-wide LLM and
+# semantic caches and run with a bounded number in flight.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "100"))
+
+
+def batch_concurrency(batch: FIRBatchRequest):
+    """Validate a batch and return its effective concurrency cap"""
+    if not batch.cases:
+        raise HTTPException(status_code=400, detail="The batch contains no cases.")
+    if len(batch.cases) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may contain at most {BATCH_MAX_SIZE} cases.",
+        )
+    return max(1, min(batch.concurrency or BATCH_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+
+
+async def run_fir_batch(cases, concurrency):
+    """Run each case through generate_fir, yielding (index, result) as each one finishes.
+
+    Failures are isolated per case: result is either {"fir": ...} or {"error": {...}}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index, case):
+        async with semaphore:
+            try:
+                return index, await with_priority(BATCH, generate_fir(case))
+            except HTTPException as e:
+                return index, {
+                    "error": {"status_code": e.status_code, "detail": e.detail}
+                }
+
+    tasks = [asyncio.create_task(run_one(i, case)) for i, case in enumerate(cases)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+@app.post("/api/generate_fir/batch")
+async def generate_fir_batch(batch: FIRBatchRequest):
+    """Generate FIRs for many cases; results come back in input order"""
+    concurrency = batch_concurrency(batch)
+    results = [None] * len(batch.cases)
+    async for index, result in run_fir_batch(batch.cases, concurrency):
+        results[index] = {"index": index, **result}
+
+    failed = sum(1 for r in results if "error" in r)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
+@app.post("/api/generate_fir/batch/stream")
+async def generate_fir_batch_stream(batch: FIRBatchRequest):
+    """SSE variant of generate_fir_batch: one "result" event per case as it finishes"""
+    concurrency = batch_concurrency(batch)
+
+    async def events():
+        async for index, result in run_fir_batch(batch.cases, concurrency):
+            yield sse_event("result", {"index": index, **result})
+        yield sse_event("done", {"count": len(batch.cases)})
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
 @app.post("/api/generate_questionnaire")
 async def generate_questionnaire(request: QuestionnaireRequest):
     try:
+        case = await resolve_case(request, "fir_content", "case_description")
+
         system_prompt = """You are an experienced Investigating Officer. 
         Your task is to review an FIR and generate a set of cross-examination questions to investigate the case further.
         
@@ -232,228 +704,353 @@ async def generate_questionnaire(request: QuestionnaireRequest):
         """
 
         user_content = f"""
-        Case Description: {request.case_description}
+        Case Description: {case["case_description"]}
         FIR Content:
-        {request.fir_content}
+        {case["fir_content"]}
         """
 
-        completion = client.chat.completions.create(
+        completion = await create_completion(
+            "generate_questionnaire",
+            stage="questionnaire",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content},
             ],
-            model="llama-3.3-70b-versatile",
             temperature=0.4,
             response_format={"type": "json_object"},
         )
 
-        return json.loads(completion.choices[0].message.content)
+        questionnaire = json.loads(completion.choices[0].message.content)
+        await save_case(request.case_id, questionnaire=questionnaire)
+        return questionnaire
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating questionnaire: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def charge_sheet_pipeline(request: ChargeSheetRequest):
+    """Build the Section 173 CrPC charge sheet prompt; yields ("draft", kwargs) like fir_pipeline"""
+    case = await resolve_case(
+        request,
+        "fir_content",
+        "case_description",
+        "officer_name",
+        "officer_rank",
+        "police_station",
+    )
+
+    system_prompt = """You are a Senior Police Officer responsible for filing the Final Report (Charge Sheet) under Section 173 CrPC.
+    
+    Based on the FIR and the interrogation answers (investigation findings), draft a formal Charge Sheet.
+    
+    STRICT FORMATTING RULES:
+    1.  **Main Header**: "IN THE COURT OF CHIEF JUDICIAL MAGISTRATE, VIZIANAGARAM" (H1 Header, Uppercase).
+    2.  **No AI Disclaimers**: Absolutely none.
+    3.  **Layout**:
+        -   Use H2 for Section Titles (e.g., "1. POLICE REPORT NO.", "2. ACCUSED DETAILS").
+        -   Use standard paragraphs for content.
+        -   Ensure there is ample spacing (use line breaks) between sections.
+    
+    **CONTENT SECTIONS**:
+    
+    # IN THE COURT OF CHIEF JUDICIAL MAGISTRATE, VIZIANAGARAM
+
+    ## 1. POLICE REPORT & DETAILS
+    **FIR No:** ... | **Date:** ... | **Police Station:** ...
+
+    ## 2. DETAILS OF ACCUSED PERSON(S)
+    Name: ...
+    Address: ...
+
+    ## 3. NATURE OF OFFENCE (SECTIONS OF LAW)
+    ...
+
+    ## 4. BRIEF FACTS OF THE CASE
+    ...
+
+    ## 5. INVESTIGATION FINDINGS & QUESTIONNAIRE
+    (Write a brief summary and then YOU MUST INCLUDE the exact cross-examination Questions and Answers for both the Complainant and the Accused here).
+    ...
+
+    ## 6. CHARGES FRAMED
+    The investigation has established prima facie evidence against the accused for offenses under:
+    ...
+
+    ## 7. LIST OF WITNESSES
+    1. Complainant: ...
+    2. Investigating Officer: {request.officer_name}, {request.officer_rank}
+
+    ## 8. PRAYER TO THE COURT
+    ## 8. PRAYER TO THE COURT
+    It is respectfully prayed that the Honorable Court may take cognizance of the offenses...
+    
+    IMPORTANT: Generate the output strictly in English.
+    """
+
+    # Format Q&A for the model
+    p_qa = "\n".join([f"Q: {q}\nA: {a}" for q, a in request.plaintiff_answers.items()])
+    d_qa = "\n".join([f"Q: {q}\nA: {a}" for q, a in request.defendant_answers.items()])
+
+    # Sections verified against the law DB at the FIR stage, when the case has a session
+    verified_sections = ""
+    if case.get("relevant_laws"):
+        verified_sections = f"""
+    Verified Sections of Law (from the FIR stage):
+    {case["relevant_laws"]}
+    """
+
+    user_content = f"""
+    FIR Context:
+    {case["fir_content"]}
+    {verified_sections}
+    Investigation Findings:
+    --- Plaintiff (Complainant) Interrogation ---
+    {p_qa}
+    
+    --- Defendant (Accused) Interrogation ---
+    {d_qa}
+
+    --- Investigation Synopsis ---
+    {request.investigation_summary}
+    
+    Officer Submitting: {case["officer_name"]}, {case["officer_rank"]}
+    Police Station: {case["police_station"]}
+    """
+
+    yield "draft", {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ],
+        "temperature": 0.3,
+    }
+
+
+async def finish_charge_sheet(request, charge_sheet):
+    """Store the charge sheet and interrogation answers; drops precedents of an older draft"""
+    await save_case(
+        request.case_id,
+        charge_sheet_content=charge_sheet,
+        plaintiff_answers=request.plaintiff_answers,
+        defendant_answers=request.defendant_answers,
+        precedents=None,
+        original_verdict=None,
+    )
+    return {"case_id": request.case_id} if request.case_id else {}
+
+
 @app.post("/api/generate_charge_sheet")
 async def generate_charge_sheet(request: ChargeSheetRequest):
     try:
-        system_prompt = """You are a Senior Police Officer responsible for filing the Final Report (Charge Sheet) under Section 173 CrPC.
-        
-        Based on the FIR and the interrogation answers (investigation findings), draft a formal Charge Sheet.
-        
-        STRICT FORMATTING RULES:
-        1.  **Main Header**: "IN THE COURT OF CHIEF JUDICIAL MAGISTRATE, VIZIANAGARAM" (H1 Header, Uppercase).
-        2.  **No AI Disclaimers**: Absolutely none.
-        3.  **Layout**:
-            -   Use H2 for Section Titles (e.g., "1. POLICE REPORT NO.", "2. ACCUSED DETAILS").
-            -   Use standard paragraphs for content.
-            -   Ensure there is ample spacing (use line breaks) between sections.
-        
-        **CONTENT SECTIONS**:
-        
-        # IN THE COURT OF CHIEF JUDICIAL MAGISTRATE, VIZIANAGARAM
-
-        ## 1. POLICE REPORT & DETAILS
-        **FIR No:** ... | **Date:** ... | **Police Station:** ...
-
-        ## 2. DETAILS OF ACCUSED PERSON(S)
-        Name: ...
-        Address: ...
-
-        ## 3. NATURE OF OFFENCE (SECTIONS OF LAW)
-        ...
-
-        ## 4. BRIEF FACTS OF THE CASE
-        ...
-
-        ## 5. INVESTIGATION FINDINGS & QUESTIONNAIRE
-        (Write a brief summary and then YOU MUST INCLUDE the exact cross-examination Questions and Answers for both the Complainant and the Accused here).
-        ...
-
-        ## 6. CHARGES FRAMED
-        The investigation has established prima facie evidence against the accused for offenses under:
-        ...
-
-        ## 7. LIST OF WITNESSES
-        1. Complainant: ...
-        2. Investigating Officer: {request.officer_name}, {request.officer_rank}
-
-        ## 8. PRAYER TO THE COURT
-        ## 8. PRAYER TO THE COURT
-        It is respectfully prayed that the Honorable Court may take cognizance of the offenses...
-        
-        IMPORTANT: Generate the output strictly in English.
-        """
-
-        # Format Q&A for the model
-        p_qa = "\n".join(
-            [f"Q: {q}\nA: {a}" for q, a in request.plaintiff_answers.items()]
-        )
-        d_qa = "\n".join(
-            [f"Q: {q}\nA: {a}" for q, a in request.defendant_answers.items()]
+        draft_kwargs, _ = await run_pipeline(charge_sheet_pipeline(request))
+        completion = await create_completion(
+            "generate_charge_sheet", stage="draft", **draft_kwargs
         )
 
-        user_content = f"""
-        FIR Context:
-        {request.fir_content}
-        
-        Investigation Findings:
-        --- Plaintiff (Complainant) Interrogation ---
-        {p_qa}
-        
-        --- Defendant (Accused) Interrogation ---
-        {d_qa}
-
-        --- Investigation Synopsis ---
-        {request.investigation_summary}
-        
-        Officer Submitting: {request.officer_name}, {request.officer_rank}
-        Police Station: {request.police_station}
-        """
-
-        completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content},
-            ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-        )
-
-        return {"charge_sheet": completion.choices[0].message.content}
+        charge_sheet = completion.choices[0].message.content
+        return {
+            "charge_sheet": charge_sheet,
+            **(await finish_charge_sheet(request, charge_sheet)),
+        }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating charge sheet: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/predict_verdict")
-async def predict_verdict(request: VerdictRequest):
-    try:
-        # --- END-TO-END HISTORICAL CASE RETRIEVAL AGENT ---
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_historical_cases",
-                    "description": "Searches the historical case vector database for cases matching the query.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query. For better results, describe the crime type, specific facts, and relevant legal keywords (e.g. 'theft, stolen mobile phone, section 378').",
-                            },
+@app.post("/api/generate_charge_sheet/stream")
+async def generate_charge_sheet_stream(request: ChargeSheetRequest):
+    """SSE variant of generate_charge_sheet: streams the charge sheet token by token"""
+    return StreamingResponse(
+        stream_document(
+            charge_sheet_pipeline(request),
+            "generate_charge_sheet",
+            "charge_sheet",
+            lambda progress, charge_sheet: finish_charge_sheet(request, charge_sheet),
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+async def run_precedent_agent(case_description, charge_sheet_content):
+    """Tool-calling agent that searches the Cases DB for precedents; returns its final summary"""
+    tools = [
+        {
+            "type": "function",
+            "function": {
+                "name": "search_historical_cases",
+                "description": "Searches the historical case vector database for cases matching the query, optionally only among cases that applied given IPC sections or belong to a category.",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "The search query. For better results, describe the crime type, specific facts, and relevant legal keywords (e.g. 'theft, stolen mobile phone, section 378').",
+                        },
+                        "sections": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Only search cases that applied at least one of these IPC section numbers (e.g. ['392', '397']).",
+                        },
+                        "category": {
+                            "type": "string",
+                            "enum": list(CATEGORIES),
+                            "description": "Only search cases of this category.",
                         },
-                        "required": ["query"],
                     },
+                    "required": ["query"],
                 },
-            }
-        ]
+            },
+        }
+    ]
 
-        system_msg = """You are an end-to-end autonomous Precedent Retrieval Agent. 
+    system_msg = """You are an end-to-end autonomous Precedent Retrieval Agent. 
 Your goal is to find 3-5 HIGHLY RELEVANT historical case precedents that establish standard rulings for a given case description and Charge Sheet.
 
 STEPS YOU MUST FOLLOW:
 1. Carefully analyze the facts of the case description AND the sections of law applied in the Charge Sheet.
-2. Call the `search_historical_cases` tool with a highly specific query containing the exact Section Numbers applied and key facts (e.g., 'Section 392 IPC robbery gold chain').
+2. Call the `search_historical_cases` tool with a highly specific query containing the exact Section Numbers applied and key facts (e.g., 'Section 392 IPC robbery gold chain'), and pass the IPC section numbers from the Charge Sheet in `sections` (e.g. ["392"]) so only cases that applied them are searched.
 3. Read the fetched historical cases. Verify if they match the core facts and nature of the current case, particularly matching the sections of law.
 4. CRITICAL: If they do NOT match (e.g. you searched for theft but got a bus accident or dowry case), YOU MUST reject them.
-5. If your initial queries fail to bring back relevant cases, formulate BROADER queries. Search for the root legal terms rather than ultra-specific facts (e.g. use "robbery Section 392" or "theft Section 378" instead of "snatching gold chain from a person on a bike").
+5. If your initial queries fail to bring back relevant cases, formulate BROADER queries: drop the `sections` filter or keep only the primary section, and search for the root legal terms rather than ultra-specific facts (e.g. use "robbery Section 392" or "theft Section 378" instead of "snatching gold chain from a person on a bike").
 6. Once you have fetched truly relevant historical cases, output the final list of the relevant cases and provide a 1-sentence reasoning for why they establish precedent for the case at hand.
 If none are relevant after 4 tries, return "No strictly relevant precedents established."
 Do not include conversational filler in your final output.
 """
-        messages = [
-            {"role": "system", "content": system_msg},
-            {
-                "role": "user",
-                "content": f"Case Description: {request.case_description}\n\nCharge Sheet Content (Read for Sections): {request.charge_sheet_content}",
-            },
-        ]
-
-        historical_cases_context = ""
-        max_iterations = 4
-        for i in range(max_iterations):
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=messages,
-                tools=tools,
-                tool_choice="auto",
-                temperature=0.1,
-                max_tokens=2000,
-            )
+    messages = [
+        {"role": "system", "content": system_msg},
+        {
+            "role": "user",
+            "content": f"Case Description: {case_description}\n\nCharge Sheet Content (Read for Sections): {charge_sheet_content}",
+        },
+    ]
+
+    historical_cases_context = ""
+    max_iterations = 4
+    for i in range(max_iterations):
+        metrics.AGENT_ITERATIONS.inc(endpoint=current_endpoint.get())
+        response = await create_completion(
+            "predict_verdict",
+            stage="agent",
+            messages=messages,
+            tools=tools,
+            tool_choice="auto",
+            temperature=0.1,
+            max_tokens=2000,
+        )
 
-            response_message = response.choices[0].message
-
-            message_dict = {"role": "assistant"}
-            if response_message.content:
-                message_dict["content"] = response_message.content
-            if response_message.tool_calls:
-                message_dict["tool_calls"] = [
-                    {
-                        "id": tool.id,
-                        "type": "function",
-                        "function": {
-                            "name": tool.function.name,
-                            "arguments": tool.function.arguments,
-                        },
-                    }
-                    for tool in response_message.tool_calls
-                ]
-            messages.append(message_dict)
-
-            # Execute tool calls if any
-            if response_message.tool_calls:
-                for tool_call in response_message.tool_calls:
-                    if tool_call.function.name == "search_historical_cases":
-                        try:
-                            args = json.loads(tool_call.function.arguments)
-                            query = args.get("query", request.case_description)
-                        except:
-                            query = request.case_description
-
-                        print(f"Agent searching Cases DB with query: {query}")
-                        search_results = get_relevant_cases(query, limit=5)
-
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "name": tool_call.function.name,
-                                "content": search_results
-                                or "No results found. Try a different query.",
-                            }
+        response_message = response.choices[0].message
+
+        message_dict = {"role": "assistant"}
+        if response_message.content:
+            message_dict["content"] = response_message.content
+        if response_message.tool_calls:
+            message_dict["tool_calls"] = [
+                {
+                    "id": tool.id,
+                    "type": "function",
+                    "function": {
+                        "name": tool.function.name,
+                        "arguments": tool.function.arguments,
+                    },
+                }
+                for tool in response_message.tool_calls
+            ]
+        messages.append(message_dict)
+
+        # Execute tool calls if any; all searches of one turn share one vector query
+        if response_message.tool_calls:
+            queries = {}
+            filters = {}
+            for tool_call in response_message.tool_calls:
+                metrics.AGENT_TOOL_CALLS.inc(
+                    endpoint=current_endpoint.get(), tool=tool_call.function.name
+                )
+                if tool_call.function.name == "search_historical_cases":
+                    try:
+                        args = json.loads(tool_call.function.arguments)
+                        query = args.get("query", case_description)
+                        filters[tool_call.id] = case_filter(
+                            args.get("sections"), args.get("category")
                         )
-            else:
-                historical_cases_context = response_message.content
-                break
+                    except:
+                        query = case_description
+
+                    print(f"Agent searching Cases DB with query: {query}")
+                    if filters.get(tool_call.id):
+                        print(
+                            f"  ...among cases with {filters[tool_call.id].describe()}"
+                        )
+                    queries[tool_call.id] = query
+
+            hit_lists = None
+            if queries:
+                hit_lists = await asearch_cases_batch(
+                    list(queries.values()),
+                    limit=5,
+                    filters=[filters.get(call_id) for call_id in queries],
+                )
+            if hit_lists is None:
+                hit_lists = [None] * len(queries)
+            results = dict(zip(queries, hit_lists))
+
+            for tool_call in response_message.tool_calls:
+                if tool_call.id in results:
+                    messages.append(
+                        {
+                            "role": "tool",
+                            "tool_call_id": tool_call.id,
+                            "name": tool_call.function.name,
+                            "content": format_case_hits(results[tool_call.id]),
+                        }
+                    )
         else:
-            if messages[-1].get("content"):
-                historical_cases_context = messages[-1]["content"]
+            historical_cases_context = response_message.content
+            break
+    else:
+        if messages[-1].get("content"):
+            historical_cases_context = messages[-1]["content"]
+        else:
+            historical_cases_context = "No strictly relevant precedents established."
+
+    return historical_cases_context
+
+
+@app.post("/api/predict_verdict")
+async def predict_verdict(request: VerdictRequest):
+    try:
+        case = await resolve_case(request, "charge_sheet_content", "case_description")
+
+        # --- END-TO-END HISTORICAL CASE RETRIEVAL AGENT ---
+        # Skipped when this session already found precedents for its stored charge
+        # sheet, or on a semantic cache hit
+        if case.get("precedents") and request.charge_sheet_content is None:
+            historical_cases_context = case["precedents"]
+        else:
+            # The agent searches by the charged sections too, so a cached result is
+            # only reused for a near-identical description with the same charges
+            charges = tuple(sorted(set(parse_citations(case["charge_sheet_content"]))))
+            cached, embedding = await semantic_lookup(
+                "verdict_precedents", case["case_description"], charges
+            )
+            if cached:
+                historical_cases_context = cached["precedents"]
             else:
-                historical_cases_context = (
-                    "No strictly relevant precedents established."
+                with span("stage", "precedent_agent"):
+                    historical_cases_context = await run_precedent_agent(
+                        case["case_description"], case["charge_sheet_content"]
+                    )
+                semantic_store(
+                    "verdict_precedents",
+                    embedding,
+                    {"precedents": historical_cases_context},
+                    charges,
                 )
 
         print(f"Historical Cases Agent Output Length: {len(historical_cases_context)}")
@@ -492,23 +1089,33 @@ Do not include conversational filler in your final output.
         """
 
         user_content = f"""
-        Case Description: {request.case_description}
+        Case Description: {case["case_description"]}
         Charge Sheet Content:
-        {request.charge_sheet_content}
+        {case["charge_sheet_content"]}
         """
 
-        completion = client.chat.completions.create(
+        completion = await create_completion(
+            "predict_verdict",
+            stage="verdict",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content},
             ],
-            model="llama-3.3-70b-versatile",
             temperature=0.2,
             response_format={"type": "json_object"},
         )
 
-        return json.loads(completion.choices[0].message.content)
+        verdict = json.loads(completion.choices[0].message.content)
+        await save_case(
+            request.case_id,
+            precedents=historical_cases_context,
+            verdict=verdict,
+            original_verdict=str(verdict.get("verdict", "Unknown")),
+        )
+        return verdict
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error predicting verdict: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -519,9 +1126,52 @@ def read_root():
     return {"message": "Lawgorithm API is running"}
 
 
+@app.get("/ready")
+def read_ready():
+    """Readiness probe: 503 until the embedding model and vector DBs are warm"""
+    if not utils.WARM.is_set():
+        return JSONResponse({"status": "warming"}, status_code=503)
+    return {
+        "status": "ready",
+        "semantic_search": utils.EMBEDDING_FUNCTION is not None,
+        "warmup_seconds": round(utils.WARMUP_SECONDS, 2),
+        "warmup_error": utils.WARMUP_ERROR,
+    }
+
+
+@app.get("/api/stats")
+def read_stats():
+    """Cache, LLM scheduler, model tier and job queue counters, plus worker memory"""
+    return {
+        "process": metrics.process_memory(),
+        "llm_backend": llm_backend.snapshot(),
+        "llm_scheduler": llm_scheduler.snapshot(),
+        "embedding_batcher": utils.EMBEDDING_BATCHER.snapshot(),
+        "retrieval_cache": utils.retrieval_cache_snapshot(),
+        "llm_router": model_router.snapshot(),
+        "llm_cache": llm_cache.snapshot() if llm_cache else None,
+        "semantic_cache": semantic_cache.snapshot() if semantic_cache else None,
+        "jobs": job_store.queue_depth(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Prometheus text exposition of the span histograms, counters and queue gauges"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/api/analyze_fairness")
 async def analyze_fairness(request: FairnessRequest):
     try:
+        case = await resolve_case(
+            request, "charge_sheet_content", "case_description", "original_verdict"
+        )
+        # Defaulted only after the merge so it never masks the session's accused.
+        case["accused_name"] = case.get("accused_name") or "Unknown person(s)"
+
         system_prompt = """You are a highly objective Judicial Auditor focused on ensuring fair, unbiased legal outcomes.
 
 Your task is to evaluate the provided Case Description, Charge Sheet, and Predicted Verdict to determine if the proceedings align with standard legal and ethical practices.
@@ -546,24 +1196,182 @@ Please ensure your analysis is generated strictly in English.
 """
 
         user_content = f"""
-        Case Description: {request.case_description}
-        Original Verdict: {request.original_verdict}
+        Accused: {case["accused_name"]}
+        Case Description: {case["case_description"]}
+        Original Verdict: {case["original_verdict"]}
         Charge Sheet Content (Includes Interrogation):
-        {request.charge_sheet_content}
+        {case["charge_sheet_content"]}
         """
 
-        completion = client.chat.completions.create(
+        completion = await create_completion(
+            "analyze_fairness",
+            stage="fairness",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_content},
             ],
-            model="llama-3.3-70b-versatile",
             temperature=0.2,
             response_format={"type": "json_object"},
         )
 
-        return json.loads(completion.choices[0].message.content)
+        report = json.loads(completion.choices[0].message.content)
+        await save_case(request.case_id, fairness=report)
+        return report
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in fairness analysis: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# --- BACKGROUND CASE PIPELINE JOBS ---
+# POST /api/jobs runs the whole workflow (FIR -> questionnaire -> charge sheet -> verdict
+# -> fairness) in worker coroutines, so no HTTP request has to stay open for the slow
+# stages. Jobs live in SQLite (jobs.py) and survive a worker restart.
+
+
+def simulated_answers(questionnaire, side):
+    """Pair generated questions with their simulated answers, as the frontend does"""
+    return dict(
+        zip(
+            questionnaire.get(f"{side}_questions", []),
+            questionnaire.get(f"{side}_simulated_answers", []),
+        )
+    )
+
+
+async def job_fir(request, results):
+    return await generate_fir(FIRRequest(**request["case"]))
+
+
+# Stages after the FIR refer to the case session it opened, so they pick up the stored
+# FIR, charge sheet and verified sections instead of carrying the text along.
+
+
+async def job_questionnaire(request, results):
+    return await generate_questionnaire(
+        QuestionnaireRequest(case_id=results["fir"]["case_id"])
+    )
+
+
+async def job_charge_sheet(request, results):
+    return await generate_charge_sheet(
+        ChargeSheetRequest(
+            case_id=results["fir"]["case_id"],
+            plaintiff_answers=simulated_answers(results["questionnaire"], "plaintiff"),
+            defendant_answers=simulated_answers(results["questionnaire"], "defendant"),
+            investigation_summary=request.get("investigation_summary", ""),
+        )
+    )
+
+
+async def job_verdict(request, results):
+    return await predict_verdict(VerdictRequest(case_id=results["fir"]["case_id"]))
+
+
+async def job_fairness(request, results):
+    case = FIRRequest(**request["case"])
+    return await analyze_fairness(
+        FairnessRequest(
+            case_id=results["fir"]["case_id"],
+            plaintiff_answers=simulated_answers(results["questionnaire"], "plaintiff"),
+            defendant_answers=simulated_answers(results["questionnaire"], "defendant"),
+            accused_name=case.accused.name if case.accused else None,
+        )
+    )
+
+
+job_store = JobStore(
+    os.getenv("JOBS_DB", os.path.join(os.path.dirname(__file__), "jobs.sqlite3")),
+    ttl_seconds=float(os.getenv("JOB_TTL", "604800")),
+)
+
+
+def batch_stage(name, run_stage):
+    """Run a job stage with its LLM calls in the batch priority class, traced as job:<name>"""
+
+    async def run(request, results):
+        token = current_endpoint.set(f"job:{name}")
+        try:
+            return await with_priority(BATCH, run_stage(request, results))
+        finally:
+            current_endpoint.reset(token)
+
+    return run
+
+
+job_runner = JobRunner(
+    job_store,
+    [
+        ("fir", batch_stage("fir", job_fir)),
+        ("questionnaire", batch_stage("questionnaire", job_questionnaire)),
+        ("charge_sheet", batch_stage("charge_sheet", job_charge_sheet)),
+        ("verdict", batch_stage("verdict", job_verdict)),
+        ("fairness", batch_stage("fairness", job_fairness)),
+    ],
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "900")),
+)
+
+
+metrics.Gauge(
+    "lawgorithm_llm_queue_depth",
+    "LLM calls waiting for admission, by priority class.",
+    ["priority"],
+    lambda: {(k,): v for k, v in llm_scheduler.snapshot()["queued"].items()},
+)
+metrics.Gauge(
+    "lawgorithm_llm_in_flight",
+    "LLM calls currently awaiting the provider (streams until fully consumed).",
+    callback=lambda: {(): llm_scheduler.in_flight},
+)
+metrics.Gauge(
+    "lawgorithm_llm_tier_degraded",
+    "1 while a model tier is degraded and its stages fall back to another tier.",
+    ["tier"],
+    lambda: {
+        (k,): int(v["degraded_for"] > 0)
+        for k, v in model_router.snapshot()["tiers"].items()
+    },
+)
+metrics.Gauge(
+    "lawgorithm_jobs",
+    "Background case jobs by status (queued / running).",
+    ["status"],
+    lambda: {(k,): v for k, v in job_store.queue_depth().items()},
+)
+
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(job: CaseJobRequest):
+    job_id = await job_runner.submit(job.model_dump())
+    return {"job_id": job_id, "status": QUEUED}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "stages": job_runner.stage_names,
+        "completed_stages": [n for n in job_runner.stage_names if n in job["results"]],
+        "results": job["results"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if not await job_runner.cancel(job_id):
+        status = await asyncio.to_thread(job_store.status, job_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Job not found.")
+        raise HTTPException(status_code=409, detail=f"Job is already {status}.")
+    return {"job_id": job_id, "status": CANCELLED}
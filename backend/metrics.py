@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Route template (or "job:<stage>") the current task is serving; labels its spans
+current_endpoint = ContextVar("current_endpoint", default="none")
+# (span name, seconds) pairs of the current request, sent back as Server-Timing
+current_trace = ContextVar("current_trace", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base for metrics rendered in the Prometheus text exposition format"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                labels = _format_labels(self.labels, key, [("le", bound)])
+                yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labels, key, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels} {values[-1]}"
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}_sum{labels} {_format_value(values[-2])}"
+            yield f"{self.name}_count{labels} {values[-1]}"
+
+
+class Gauge(Metric):
+    """Gauge read at scrape time: `callback()` returns {label values tuple: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def samples(self):
+        for key, value in sorted(self.callback().items()):
+            labels = _format_labels(self.labels, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# --- METRICS ---
+
+HTTP_SECONDS = Histogram(
+    "lawgorithm_http_request_seconds",
+    "Time until the response headers were sent, by route.",
+    ["endpoint", "method", "status"],
+)
+LLM_SECONDS = Histogram(
+    "lawgorithm_llm_request_seconds",
+    "LLM call latency including scheduler wait and retries (time to first chunk when streaming).",
+    ["endpoint", "stage"],
+)
+LLM_TOKENS = Histogram(
+    "lawgorithm_llm_tokens",
+    "Prompt and completion tokens per LLM call (non-streaming calls only).",
+    ["endpoint", "stage", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+RETRIEVAL_SECONDS = Histogram(
+    "lawgorithm_retrieval_seconds",
+    "Vector DB retrieval latency including retrieval pool wait.",
+    ["endpoint", "stage"],
+)
+STAGE_SECONDS = Histogram(
+    "lawgorithm_stage_seconds",
+    "Latency of composite pipeline stages (e.g. the precedent agent).",
+    ["endpoint", "stage"],
+)
+CASE_CANDIDATES = Histogram(
+    "lawgorithm_case_candidates",
+    "Nearest cases a precedent search ranked before it had enough distinct matches.",
+    buckets=(5, 10, 20, 40, 100, 200),
+)
+AGENT_ITERATIONS = Counter(
+    "lawgorithm_agent_iterations_total",
+    "Tool-calling iterations run by the precedent agent.",
+    ["endpoint"],
+)
+AGENT_TOOL_CALLS = Counter(
+    "lawgorithm_agent_tool_calls_total",
+    "Tool calls executed by the precedent agent.",
+    ["endpoint", "tool"],
+)
+
+SPAN_HISTOGRAMS = {
+    "llm": LLM_SECONDS,
+    "retrieval": RETRIEVAL_SECONDS,
+    "stage": STAGE_SECONDS,
+}
+
+
+@contextmanager
+def span(kind, stage):
+    """Time a block as a `kind` ("llm", "retrieval" or "stage") span of `stage`.
+
+    The duration goes to the matching histogram, labelled with the current endpoint,
+    and to the current request's trace.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_HISTOGRAMS[kind].observe(
+            elapsed, endpoint=current_endpoint.get(), stage=stage
+        )
+        trace = current_trace.get()
+        if trace is not None:
+            trace.append((f"{kind}.{stage}", elapsed))
+
+
+def record_tokens(stage, usage):
+    """Record the prompt/completion token counts of a completion's `usage`"""
+    if usage is None:
+        return
+    endpoint = current_endpoint.get()
+    LLM_TOKENS.observe(
+        usage.prompt_tokens, endpoint=endpoint, stage=stage, kind="prompt"
+    )
+    LLM_TOKENS.observe(
+        usage.completion_tokens, endpoint=endpoint, stage=stage, kind="completion"
+    )
+
+
+def process_memory():
+    """Current and peak resident set size of this process, in bytes (None if unknown)"""
+    rss = peak = None
+    try:
+        with open("/proc/self/statm", "r") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+    except ImportError:
+        pass
+    return {"pid": os.getpid(), "rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+Gauge(
+    "lawgorithm_process_resident_memory_bytes",
+    "Resident set size of this worker process.",
+    callback=lambda: {(): process_memory()["rss_bytes"] or 0},
+)
+
+
+def server_timing(trace, total):
+    """Server-Timing header value for a request's spans"""
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in trace]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
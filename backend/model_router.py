@@ -0,0 +1,216 @@
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+import groq
+
+import metrics
+
+SMALL = "small"
+LARGE = "large"
+
+DEFAULT_MODELS = {SMALL: "llama-3.1-8b-instant", LARGE: "llama-3.3-70b-versatile"}
+
+# Short, tightly constrained outputs; every other stage (verification, drafts, the
+# precedent agent, verdict and fairness) needs the large model
+DEFAULT_STAGE_TIERS = {"precheck": SMALL, "guess": SMALL, "questionnaire": SMALL}
+
+# Tier to try when a tier is degraded
+FALLBACKS = {SMALL: LARGE, LARGE: SMALL}
+
+# Observed calls needed before a tier can be judged
+MIN_CALLS = 5
+
+# Failures that count against a tier's health: 5xx responses, timeouts and dropped
+# connections. A 429 is a quota problem, and the other tier's model would not answer
+# any better; other 4xx responses are the request's fault.
+TIER_FAILURES = (groq.InternalServerError, groq.APIConnectionError)
+
+TIER_SECONDS = metrics.Histogram(
+    "lawgorithm_llm_tier_seconds",
+    "Provider latency per model tier, per attempt (time to first chunk when streaming).",
+    ["tier", "model"],
+)
+TIER_CALLS = metrics.Counter(
+    "lawgorithm_llm_tier_calls_total",
+    "Provider calls per model tier by outcome (ok / error / rate_limited / rejected).",
+    ["tier", "model", "outcome"],
+)
+TIER_FALLBACKS = metrics.Counter(
+    "lawgorithm_llm_tier_fallbacks_total",
+    "Calls routed away from their stage's tier because it was degraded.",
+    ["stage", "from_tier", "to_tier"],
+)
+
+
+class TierHealth:
+    """Rolling latency and error record of one tier over its last `window` calls"""
+
+    def __init__(self, window):
+        self.calls = deque(maxlen=window)  # (seconds, ok)
+        self.degraded_until = 0.0
+        self.trips = 0
+
+    def median_latency(self):
+        latencies = [seconds for seconds, ok in self.calls if ok]
+        return statistics.median(latencies) if latencies else None
+
+    def error_rate(self):
+        if not self.calls:
+            return None
+        return sum(1 for _, ok in self.calls if not ok) / len(self.calls)
+
+
+class ModelRouter:
+    """Maps pipeline stages to model tiers and falls back when a tier degrades.
+
+    A tier is degraded for `cooldown` seconds once the median latency of its last
+    `window` calls exceeds its `max_latency`, or their error rate exceeds
+    `max_error_rate`. Its record is then cleared, so after the cooldown it is probed
+    again from scratch. Calls for a stage whose tier is degraded go to the fallback
+    tier while that one is healthy.
+    """
+
+    def __init__(
+        self,
+        models=None,
+        stage_tiers=None,
+        max_latency=None,
+        max_error_rate=0.5,
+        window=20,
+        cooldown=60.0,
+    ):
+        self.models = {**DEFAULT_MODELS, **(models or {})}
+        self.stage_tiers = DEFAULT_STAGE_TIERS if stage_tiers is None else stage_tiers
+        self.max_latency = {SMALL: 5.0, LARGE: 30.0, **(max_latency or {})}
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.tiers = {model: tier for tier, model in self.models.items()}
+        self._health = {tier: TierHealth(window) for tier in self.models}
+        self._lock = threading.Lock()
+
+    def tier_for(self, stage):
+        """The tier `stage` is configured for (large unless mapped otherwise)"""
+        return self.stage_tiers.get(stage, LARGE)
+
+    def _healthy(self, tier):
+        return time.monotonic() >= self._health[tier].degraded_until
+
+    def route(self, stage):
+        """Model to use for a `stage` call right now"""
+        tier = self.tier_for(stage)
+        if not self._healthy(tier):
+            fallback = FALLBACKS.get(tier)
+            if fallback in self.models and self._healthy(fallback):
+                TIER_FALLBACKS.inc(stage=stage, from_tier=tier, to_tier=fallback)
+                tier = fallback
+        return self.models[tier]
+
+    def _count(self, model, outcome):
+        TIER_CALLS.inc(
+            tier=self.tiers.get(model, "other"), model=model, outcome=outcome
+        )
+
+    def observe(self, model, seconds, ok):
+        """Record one provider call; trips the tier when its window crosses a limit"""
+        tier = self.tiers.get(model)
+        self._count(model, "ok" if ok else "error")
+        if tier is None:
+            return
+        if ok:
+            TIER_SECONDS.observe(seconds, tier=tier, model=model)
+        health = self._health[tier]
+        with self._lock:
+            health.calls.append((seconds, ok))
+            if len(health.calls) < MIN_CALLS:
+                return
+            median = health.median_latency()
+            if health.error_rate() > self.max_error_rate or (
+                median is not None and median > self.max_latency[tier]
+            ):
+                print(
+                    f"Model tier {tier} degraded (median {median or 0:.2f}s, "
+                    f"error rate {health.error_rate():.2f}), "
+                    f"falling back for {self.cooldown}s"
+                )
+                health.degraded_until = time.monotonic() + self.cooldown
+                health.trips += 1
+                health.calls.clear()
+
+    def track(self, create):
+        """Wrap a backend's create() so every attempt is observed under its model.
+
+        Only latency and TIER_FAILURES feed the tier's health; rate-limited and
+        rejected calls are counted but never trip a fallback.
+        """
+
+        async def tracked(**kwargs):
+            model = kwargs.get("model")
+            start = time.perf_counter()
+            try:
+                response = await create(**kwargs)
+            except groq.RateLimitError:
+                self._count(model, "rate_limited")
+                raise
+            except TIER_FAILURES:
+                self.observe(model, time.perf_counter() - start, False)
+                raise
+            except Exception:
+                self._count(model, "rejected")
+                raise
+            self.observe(model, time.perf_counter() - start, True)
+            return response
+
+        return tracked
+
+    def snapshot(self):
+        """Model, health and degradation state per tier, plus the stage mapping"""
+        now = time.monotonic()
+        tiers = {}
+        for tier, model in self.models.items():
+            health = self._health[tier]
+            median = health.median_latency()
+            error_rate = health.error_rate()
+            tiers[tier] = {
+                "model": model,
+                "calls_in_window": len(health.calls),
+                "median_latency_ms": round(median * 1000, 1) if median else None,
+                "error_rate": round(error_rate, 3) if error_rate is not None else None,
+                "degraded_for": round(max(0.0, health.degraded_until - now), 1),
+                "trips": health.trips,
+            }
+        return {"stage_tiers": dict(self.stage_tiers), "tiers": tiers}
+
+
+def _parse_pairs(value):
+    """Parse "stage=tier,stage=tier" settings into a dict"""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {k.strip(): v.strip() for k, v in pairs}
+
+
+def router_from_env():
+    """Build the process-wide router from LLM_MODEL_* / LLM_STAGE_TIERS / LLM_FALLBACK_*.
+
+    LLM_ROUTING=off sends every stage to the large tier (the pre-routing behaviour).
+    """
+    stage_tiers = DEFAULT_STAGE_TIERS
+    if os.getenv("LLM_STAGE_TIERS") is not None:
+        stage_tiers = _parse_pairs(os.getenv("LLM_STAGE_TIERS"))
+    if os.getenv("LLM_ROUTING", "on").lower() in ("0", "off", "false", "no"):
+        stage_tiers = {}
+    return ModelRouter(
+        models={
+            SMALL: os.getenv("LLM_MODEL_SMALL", DEFAULT_MODELS[SMALL]),
+            LARGE: os.getenv("LLM_MODEL_LARGE", DEFAULT_MODELS[LARGE]),
+        },
+        stage_tiers=stage_tiers,
+        max_latency={
+            SMALL: float(os.getenv("LLM_FALLBACK_LATENCY_SMALL", "5")),
+            LARGE: float(os.getenv("LLM_FALLBACK_LATENCY_LARGE", "30")),
+        },
+        max_error_rate=float(os.getenv("LLM_FALLBACK_ERROR_RATE", "0.5")),
+        window=int(os.getenv("LLM_FALLBACK_WINDOW", "20")),
+        cooldown=float(os.getenv("LLM_FALLBACK_COOLDOWN", "60")),
+    )
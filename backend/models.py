@@ -25,40 +25,57 @@ class FIRRequest(BaseModel):
     officer_rank: Optional[str] = "Not provided"
 
 
+class FIRBatchRequest(BaseModel):
+    cases: List[FIRRequest]
+    concurrency: Optional[int] = None  # defaults to BATCH_CONCURRENCY
+
+
+class CaseJobRequest(BaseModel):
+    case: FIRRequest
+    investigation_summary: str = ""
+
+
+# Later stages accept either a case_id returned by generate_fir or the raw text;
+# fields left out are filled from the case session.
+
+
 class QuestionnaireRequest(BaseModel):
-    fir_content: str
-    case_description: str
+    case_id: Optional[str] = None
+    fir_content: Optional[str] = None
+    case_description: Optional[str] = None
 
 
 class ChargeSheetRequest(BaseModel):
-    fir_content: str
-    case_description: str
+    case_id: Optional[str] = None
+    fir_content: Optional[str] = None
+    case_description: Optional[str] = None
     plaintiff_answers: dict
     defendant_answers: dict
     investigation_summary: str = ""
-    officer_name: str
-    officer_rank: str
-    police_station: str
+    officer_name: Optional[str] = None
+    officer_rank: Optional[str] = None
+    police_station: Optional[str] = None
 
 
 class VerdictRequest(BaseModel):
-    charge_sheet_content: str
-    case_description: str
+    case_id: Optional[str] = None
+    charge_sheet_content: Optional[str] = None
+    case_description: Optional[str] = None
 
 
 # --- Fairness Analysis Models ---
 
 
 class FairnessRequest(BaseModel):
-    charge_sheet_content: str
-    case_description: str
-    original_verdict: str  # e.g. "Guilty"
-    plaintiff_answers: dict
-    defendant_answers: dict
-    accused_name: Optional[str] = "Unknown person(s)"
+    case_id: Optional[str] = None
+    charge_sheet_content: Optional[str] = None
+    case_description: Optional[str] = None
+    original_verdict: Optional[str] = None  # e.g. "Guilty"
+    plaintiff_answers: Optional[dict] = None
+    defendant_answers: Optional[dict] = None
+    accused_name: Optional[str] = None
 
 
 class FairnessReport(BaseModel):
     overall_label: str  # "Fair" | "Unfair" | "Needs Review"
     explanation: str
-
@@ -0,0 +1,86 @@
+import math
+import os
+import re
+from collections import Counter
+
+VALID = "VALID"
+INVALID = "INVALID"
+AMBIGUOUS = "AMBIGUOUS"
+
+# Max cosine similarity to any law section / historical case. Real incident descriptions
+# land well above VALID_SIMILARITY; keyboard mashing and off-topic chatter stay below
+# INVALID_SIMILARITY. Everything in between is left to the LLM.
+VALID_SIMILARITY = float(os.getenv("PRECHECK_VALID_SIMILARITY", "0.35"))
+INVALID_SIMILARITY = float(os.getenv("PRECHECK_INVALID_SIMILARITY", "0.15"))
+
+# Common English function words: real sentences are full of them, gibberish has none
+STOPWORDS = set("""
+    a an the and or but if of to in on at by for from with without into near after
+    before while is was were are be been has had have did do i me my we our he him his
+    she her they them their it its this that these those who which when where not no
+    all some any up down out over then
+    """.split())
+VOWELS = set("aeiou")
+
+
+def text_features(text):
+    """Cheap lexical features of a case description"""
+    tokens = re.findall(r"[a-z]+", text.lower())
+    letters = "".join(tokens)
+    non_space = [c for c in text if not c.isspace()]
+
+    counts = Counter(letters)
+    entropy = -sum(
+        (n / len(letters)) * math.log2(n / len(letters)) for n in counts.values()
+    )
+
+    return {
+        "chars": len(text.strip()),
+        "words": len(tokens),
+        "alpha_ratio": len(letters) / len(non_space) if non_space else 0.0,
+        "char_entropy": entropy,
+        "vowel_ratio": (
+            sum(c in VOWELS for c in letters) / len(letters) if letters else 0.0
+        ),
+        "stopword_ratio": (
+            sum(t in STOPWORDS for t in tokens) / len(tokens) if tokens else 0.0
+        ),
+        "longest_token": max((len(t) for t in tokens), default=0),
+    }
+
+
+def classify_description(text, similarity=None):
+    """Local VALID / INVALID / AMBIGUOUS decision for the FIR pre-check.
+
+    `similarity` is the max cosine similarity of the description to the laws and cases
+    collections (None when the vector DBs are unavailable, in which case nothing is
+    classified VALID locally).
+    """
+    f = text_features(text)
+
+    # Clear-cut gibberish: no words, symbol soup, keyboard mashing or one repeated key
+    if f["words"] == 0 or f["alpha_ratio"] < 0.5:
+        return INVALID
+    if f["longest_token"] > 30:
+        return INVALID
+    if f["chars"] >= 10 and f["char_entropy"] < 2.5:
+        return INVALID
+    if f["words"] >= 3 and not 0.2 <= f["vowel_ratio"] <= 0.65:
+        return INVALID
+    if (
+        similarity is not None
+        and similarity < INVALID_SIMILARITY
+        and f["stopword_ratio"] == 0
+    ):
+        return INVALID
+
+    # Clearly a described incident: a real sentence that sits close to the legal corpus
+    if (
+        similarity is not None
+        and similarity >= VALID_SIMILARITY
+        and f["words"] >= 5
+        and f["stopword_ratio"] >= 0.1
+    ):
+        return VALID
+
+    return AMBIGUOUS
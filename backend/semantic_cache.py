@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticCache:
+    """Near-duplicate cache of pipeline results, looked up by embedding similarity.
+
+    Each stage (e.g. "fir_sections", "verdict_precedents") keeps its own entries, so a
+    case description only matches results previously computed for the same stage.
+    An entry can also carry a `context` (anything else the result depends on, such as
+    the charged sections), which a lookup must match exactly.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=1000, ttl_seconds=86400):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # stage -> {"vectors", "payloads", "expires", "contexts", "matrix"}
+        self._stages = {}
+        self.stats = {}  # stage -> {"hits", "misses"}
+
+    def _count(self, stage, field):
+        counters = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _purge(entries):
+        """Drop expired entries"""
+        now = time.time()
+        keep = [i for i, expires in enumerate(entries["expires"]) if expires > now]
+        if len(keep) < len(entries["expires"]):
+            for key in ("vectors", "payloads", "expires", "contexts"):
+                entries[key] = [entries[key][i] for i in keep]
+            entries["matrix"] = None
+
+    def lookup(self, stage, embedding, context=None):
+        """Return the payload of the most similar entry above the threshold, or None.
+
+        Only entries stored with an equal `context` are considered.
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            entries = self._stages.get(stage)
+            if entries:
+                self._purge(entries)
+            if entries and entries["vectors"]:
+                if entries["matrix"] is None:
+                    entries["matrix"] = np.stack(entries["vectors"])
+                similarities = entries["matrix"] @ query
+                for i, entry_context in enumerate(entries["contexts"]):
+                    if entry_context != context:
+                        similarities[i] = -np.inf
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._count(stage, "hits")
+                    return entries["payloads"][best]
+            self._count(stage, "misses")
+            return None
+
+    def store(self, stage, embedding, payload, context=None):
+        with self._lock:
+            entries = self._stages.setdefault(
+                stage,
+                {
+                    "vectors": [],
+                    "payloads": [],
+                    "expires": [],
+                    "contexts": [],
+                    "matrix": None,
+                },
+            )
+            self._purge(entries)
+            entries["vectors"].append(self._normalize(embedding))
+            entries["payloads"].append(payload)
+            entries["expires"].append(time.time() + self.ttl_seconds)
+            entries["contexts"].append(context)
+            overflow = len(entries["vectors"]) - self.max_entries
+            if overflow > 0:
+                for key in ("vectors", "payloads", "expires", "contexts"):
+                    del entries[key][:overflow]
+            entries["matrix"] = None
+
+    def snapshot(self):
+        """Per-stage hit/miss counters, hit rates and entry counts"""
+        with self._lock:
+            report = {}
+            for stage, counters in self.stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                report[stage] = {
+                    **counters,
+                    "hit_rate": (
+                        round(counters["hits"] / lookups, 4) if lookups else 0.0
+                    ),
+                    "entries": len(self._stages.get(stage, {}).get("vectors", [])),
+                }
+            return {"threshold": self.threshold, "stages": report}
+
+
+def semantic_cache_from_env():
+    """Build the process-wide semantic cache from SEMANTIC_CACHE_* settings (None when disabled)"""
+    if os.getenv("SEMANTIC_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    return SemanticCache(
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+        ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+    )
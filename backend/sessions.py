@@ -0,0 +1,75 @@
+import json
+import sqlite3
+import time
+import uuid
+import zlib
+
+
+class CaseSessionStore:
+    """Server-side artifacts of a case (FIR, verified sections, charge sheet, ...), keyed by case_id.
+
+    Artifacts are kept as one zlib-compressed JSON document per case in SQLite, so later
+    stages can send a short case_id instead of re-uploading multi-KB documents, and can
+    reuse intermediate results of earlier stages.
+    """
+
+    def __init__(self, db_path, ttl_seconds=7 * 86400):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS case_sessions (
+                    id TEXT PRIMARY KEY,
+                    artifacts BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                )""")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+
+    @staticmethod
+    def _pack(artifacts):
+        blob = json.dumps(artifacts, ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(blob.encode("utf-8"))
+
+    @staticmethod
+    def _unpack(blob):
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def create(self, artifacts):
+        case_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO case_sessions (id, artifacts, expires_at) VALUES (?, ?, ?)",
+                (case_id, self._pack(artifacts), now + self.ttl_seconds),
+            )
+            conn.execute("DELETE FROM case_sessions WHERE expires_at <= ?", (now,))
+        return case_id
+
+    def get(self, case_id):
+        """Artifacts of a live case, or None if the id is unknown or expired"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT artifacts FROM case_sessions WHERE id = ? AND expires_at > ?",
+                (case_id, time.time()),
+            ).fetchone()
+        return self._unpack(row[0]) if row else None
+
+    def update(self, case_id, artifacts):
+        """Merge `artifacts` into a live case and extend its TTL. Returns False if it is gone."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT artifacts FROM case_sessions WHERE id = ? AND expires_at > ?",
+                (case_id, now),
+            ).fetchone()
+            if row is not None:
+                merged = {**self._unpack(row[0]), **artifacts}
+                conn.execute(
+                    "UPDATE case_sessions SET artifacts = ?, expires_at = ? WHERE id = ?",
+                    (self._pack(merged), now + self.ttl_seconds, case_id),
+                )
+            conn.execute("COMMIT")
+        return row is not None
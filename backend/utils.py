@@ -1,207 +1,986 @@
+import asyncio
+import functools
+import hashlib
 import json
 import os
-import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher
+from embeddings import EMBEDDING_MODEL_NAME, embedding_function_from_env
+from case_index import load_case_index
+from citations import parse_citations
+from lexical_index import load_law_index, section_key
+from metrics import CASE_CANDIDATES, span
+from vector_store import MappedVectorStore, NumpyVectorStore
 
 # --- SEMANTIC ENHANCEMENT IMPORTS ---
 try:
     import chromadb
-    from chromadb.utils import embedding_functions
 
-    HAS_SEMANTIC = True
+    HAS_CHROMADB = True
 except ImportError:
-    HAS_SEMANTIC = False
-    print("Warning: chromadb not installed. Semantic features disabled.")
+    HAS_CHROMADB = False
 
 CHROMA_CLIENT = None
 CHROMA_COLLECTION = None
 CASES_CHROMA_CLIENT = None
 CASES_CHROMA_COLLECTION = None
+EMBEDDING_FUNCTION = None
+LAW_INDEX = None
+CASE_INDEX = None
+
+# One embedding model per process, shared by both collections (the same model both
+# vector DBs were built with; EMBEDDING_BACKEND picks PyTorch or ONNX to run it)
+_LOAD_LOCK = threading.RLock()
+
+# Set once warmup() has loaded the model and both collections and run a first query
+WARM = threading.Event()
+WARMUP_SECONDS = None
+WARMUP_ERROR = None
+
+# --- HYBRID RETRIEVAL ---
+# Law sections are ranked by both the vector DB and a BM25 index over laws_json
+# (exact legal terms like "dacoity" or "hit and run" that MiniLM embeds poorly), and
+# the two rankings are merged with reciprocal-rank fusion:
+#   score = sum over rankers of weight / (RRF_K + rank)
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "on").lower() not in (
+    "0",
+    "off",
+    "false",
+    "no",
+)
+RRF_K = float(os.getenv("RRF_K", "60"))
+RRF_WEIGHT_VECTOR = float(os.getenv("RRF_WEIGHT_VECTOR", "1.0"))
+RRF_WEIGHT_BM25 = float(os.getenv("RRF_WEIGHT_BM25", "1.0"))
+
+# Score of a section cited in the query ("IPC Section 378", "u/s 302 r/w 34 IPC"):
+# above any retrieval score, so cited sections stay first after merge_section_hits
+CITATION_SCORE = 2.0
+
+# --- VECTOR STORES ---
+# Where each collection is searched: "chroma" (ChromaDB's HNSW index and SQLite
+# metadata), "numpy" (exact search over an in-memory copy of the collection's
+# embeddings) or "mmap" (exact search over the memory-mapped export the build
+# scripts write to laws_vectors/ and cases_vectors/, shared by all workers and
+# needing no chromadb; see vector_store.py). VECTOR_STORE_DTYPE=float16 halves the
+# in-memory copy (the exports' dtype is fixed when they are built).
+LAWS_VECTOR_STORE = os.getenv("LAWS_VECTOR_STORE", "chroma").lower()
+CASES_VECTOR_STORE = os.getenv("CASES_VECTOR_STORE", "chroma").lower()
+VECTOR_STORE_DTYPE = np.dtype(os.getenv("VECTOR_STORE_DTYPE", "float32"))
+
+# --- PRECEDENT SEARCH ---
+# search_cases_batch ranks CASE_CANDIDATES_INITIAL nearest cases per query (ids and
+# distances only) and fetches the documents of those above the similarity threshold.
+# Only when duplicate facts leave fewer than `limit` distinct cases does it re-rank
+# CASE_CANDIDATES_GROWTH times as many, up to CASE_CANDIDATES_MAX.
+CASE_CANDIDATES_INITIAL = int(os.getenv("CASE_CANDIDATES_INITIAL", "10"))
+CASE_CANDIDATES_GROWTH = int(os.getenv("CASE_CANDIDATES_GROWTH", "4"))
+CASE_CANDIDATES_MAX = int(os.getenv("CASE_CANDIDATES_MAX", "100"))
+
+HAS_SEMANTIC = HAS_CHROMADB or "mmap" in (LAWS_VECTOR_STORE, CASES_VECTOR_STORE)
+if not HAS_SEMANTIC:
+    print("Warning: chromadb not installed. Semantic features disabled.")
+
+# Bounded pool for blocking ChromaDB queries, so retrieval never stalls the event loop
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieval"
+)
+
+
+class LRUCache:
+    """Thread-safe LRU map with hit/miss counters (max_entries=0 disables it)"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, predicate):
+        """Drop every entry whose key matches `predicate`"""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# --- RETRIEVAL CACHES ---
+# The precedent agent and repeat submissions re-issue the same queries ("theft Section
+# 378"). Query embeddings are cached by normalized text, and vector DB results by
+# (collection, index version, embedding hash, k, threshold), so a rebuilt or modified
+# index never serves stale results.
+RETRIEVAL_CACHE = os.getenv("RETRIEVAL_CACHE", "on").lower() not in (
+    "0",
+    "off",
+    "false",
+    "no",
+)
+EMBEDDING_CACHE = LRUCache(
+    int(os.getenv("EMBEDDING_CACHE_SIZE", "4096")) if RETRIEVAL_CACHE else 0
+)
+RESULT_CACHE = LRUCache(
+    int(os.getenv("RETRIEVAL_RESULT_CACHE_SIZE", "2048")) if RETRIEVAL_CACHE else 0
+)
+# Seconds between checks of a collection's version
+INDEX_VERSION_TTL = float(os.getenv("INDEX_VERSION_TTL", "30"))
+_INDEX_VERSIONS = {}  # collection name -> (checked at, version)
+_CHROMA_CLIENTS = {}  # collection name -> client, for collections queried directly
+
+
+def normalize_query(text):
+    """Cache key for a query text: the model is uncased and ignores extra whitespace"""
+    return " ".join(text.lower().split())
+
+
+def embedding_key(embedding):
+    return hashlib.blake2b(
+        np.asarray(embedding, dtype=np.float32).tobytes(), digest_size=16
+    ).hexdigest()
+
+
+def _freeze(embedding):
+    vector = np.array(embedding, dtype=np.float32)
+    vector.flags.writeable = False  # shared by every caller of a cached query
+    return vector
+
+
+def index_version(collection):
+    """Identifies a collection's contents; changes when it is rebuilt or modified.
+
+    The collection's id, document count and the `built_at` stamp the build scripts
+    write into its metadata, re-read from the DB at most every INDEX_VERSION_TTL
+    seconds. When it changes, cached results for the collection are dropped.
+    In-memory and memory-mapped stores are snapshots, so theirs never changes.
+    """
+    now = time.monotonic()
+    checked = _INDEX_VERSIONS.get(collection.name)
+    if checked and now - checked[0] < INDEX_VERSION_TTL:
+        return checked[1]
+    client = _CHROMA_CLIENTS.get(collection.name)
+    if client is not None:
+        # A fresh handle: the one being queried caches the metadata it was opened with
+        collection = client.get_collection(
+            name=collection.name, embedding_function=get_embedding_function()
+        )
+    built_at = (getattr(collection, "metadata", None) or {}).get("built_at", "")
+    version = f"{collection.id}:{collection.count()}:{built_at}"
+    _INDEX_VERSIONS[collection.name] = (now, version)
+    if checked and checked[1] != version:
+        print(f"Index '{collection.name}' changed; dropping its cached results")
+        RESULT_CACHE.discard(lambda key: key[0] == collection.name)
+    return version
+
+
+def query_collection_batch(
+    collection,
+    embeddings,
+    n_results,
+    min_similarity=None,
+    include=("documents", "metadatas", "distances"),
+    ids=None,
+):
+    """Rows of {"id", "document", "metadata", "distance"} for each query embedding.
+
+    Uncached embeddings are looked up with a single `collection.query`, searching
+    only `ids` when given. Rows below `min_similarity` (cosine) are dropped. Results
+    are cached per index version; callers must not mutate the returned rows.
+    """
+    version = index_version(collection)
+    subset = None
+    if ids is not None:
+        subset = hashlib.blake2b("\n".join(ids).encode(), digest_size=16).hexdigest()
+    keys = [
+        (
+            collection.name,
+            version,
+            embedding_key(embedding),
+            n_results,
+            min_similarity,
+            tuple(include),
+            subset,
+        )
+        for embedding in embeddings
+    ]
+    found = [RESULT_CACHE.get(key) for key in keys]
+    missing = [i for i, rows in enumerate(found) if rows is None]
+    if not missing:
+        return found
+
+    results = collection.query(
+        query_embeddings=[embeddings[i] for i in missing],
+        n_results=n_results,
+        include=list(include),
+        **({} if ids is None else {"ids": list(ids)}),
+    )
+    for n, i in enumerate(missing):
+        rows = []
+        for k, doc_id in enumerate(results["ids"][n] if results["ids"] else []):
+            row = {"id": doc_id}
+            for field, name in (
+                ("documents", "document"),
+                ("metadatas", "metadata"),
+                ("distances", "distance"),
+            ):
+                if field in include:
+                    row[name] = results[field][n][k]
+            if min_similarity is not None and 1.0 - row["distance"] < min_similarity:
+                continue
+            rows.append(row)
+        RESULT_CACHE.put(keys[i], rows)
+        found[i] = rows
+    return found
+
+
+def query_collection(collection, embedding, n_results, **kwargs):
+    """query_collection_batch for one embedding"""
+    return query_collection_batch(collection, [embedding], n_results, **kwargs)[0]
+
+
+def fetch_records(collection, ids):
+    """{id: (document, metadata)} for the given ids, with one `collection.get`"""
+    if not ids:
+        return {}
+    result = collection.get(ids=list(ids), include=["documents", "metadatas"])
+    return {
+        doc_id: (doc, meta)
+        for doc_id, doc, meta in zip(
+            result["ids"], result["documents"], result["metadatas"]
+        )
+    }
+
+
+def retrieval_cache_snapshot():
+    """Hit rates of the query embedding and result caches"""
+    return {
+        "embeddings": EMBEDDING_CACHE.snapshot(),
+        "results": RESULT_CACHE.snapshot(),
+        "index_versions": {name: v for name, (_, v) in _INDEX_VERSIONS.items()},
+    }
+
+
+def get_embedding_function():
+    """The process-wide embedding function (see embeddings.py), created on first use"""
+    global EMBEDDING_FUNCTION
+    with _LOAD_LOCK:
+        if EMBEDDING_FUNCTION is None:
+            print(f"Loading embedding model {EMBEDDING_MODEL_NAME}...")
+            EMBEDDING_FUNCTION = embedding_function_from_env()
+    return EMBEDDING_FUNCTION
+
+
+def get_law_index():
+    """The laws BM25 index (see lexical_index.py), loaded on first use"""
+    global LAW_INDEX
+    with _LOAD_LOCK:
+        if LAW_INDEX is None:
+            LAW_INDEX = load_law_index()
+    return LAW_INDEX
+
+
+def _encode_batch(texts):
+    return get_embedding_function()(texts)
+
+
+# Concurrent requests' query texts are encoded together in one forward pass
+EMBEDDING_BATCHER = EmbeddingBatcher(
+    _encode_batch,
+    max_batch=int(os.getenv("EMBED_BATCH_MAX", "32")),
+    max_wait=float(os.getenv("EMBED_BATCH_WAIT_MS", "3")) / 1000,
+)
+
+
+def open_vector_store(collection, backend):
+    """What queries against `collection` go to: the collection itself or a copy"""
+    if backend == "chroma":
+        return collection
+    if backend != "numpy":
+        raise ValueError(f"Unknown vector store: {backend!r}")
+    start = time.perf_counter()
+    store = NumpyVectorStore.from_collection(collection, VECTOR_STORE_DTYPE)
+    print(
+        f"Loaded '{collection.name}' into memory: {store.count()} vectors, "
+        f"{store.nbytes() / 2**20:.1f} MB in {time.perf_counter() - start:.1f}s"
+    )
+    return store
+
+
+def _open_db(label, db_name, collection_name, backend, build_script):
+    """(ChromaDB client, store) for one vector DB; both None when it is missing.
+
+    The client is None for memory-mapped exports, which are opened without ChromaDB.
+    """
+    base = os.path.dirname(__file__)
+    if backend == "mmap":
+        path = os.path.join(base, f"{db_name}_vectors")
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            print(f"Vector export '{path}' not found. Please run {build_script} first.")
+            return None, None
+        get_embedding_function()
+        store = MappedVectorStore(path)
+        print(
+            f"Memory-mapped {label} vectors: {store.count()} rows "
+            f"({store.matrix.dtype}) from '{path}'"
+        )
+        return None, store
+
+    if not HAS_CHROMADB:
+        return None, None
+    db_path = os.path.join(base, f"{db_name}_chromadb")
+    if not os.path.exists(db_path):
+        print(f"ChromaDB path '{db_path}' not found. Please run {build_script} first.")
+        return None, None
+    print(f"Connecting to ChromaDB for {label} Semantic Search...")
+    client = chromadb.PersistentClient(path=db_path)
+    try:
+        collection = client.get_collection(
+            name=collection_name, embedding_function=get_embedding_function()
+        )
+    except ValueError:
+        print(
+            f"ChromaDB collection '{collection_name}' not found. Please run {build_script} first."
+        )
+        return client, None
+    if backend == "chroma":
+        _CHROMA_CLIENTS[collection_name] = client
+    return client, open_vector_store(collection, backend)
 
 
 def load_semantic_model():
-    """Lazy load ChromaDB and its specific embedding function"""
+    """Lazy load both vector DBs, sharing one embedding function.
+
+    Each is served by the store LAWS_VECTOR_STORE / CASES_VECTOR_STORE selects;
+    everything downstream only calls the Collection methods they all implement.
+    A DB that is missing is looked for again on the next call.
+    """
     global CHROMA_CLIENT, CHROMA_COLLECTION
-    if HAS_SEMANTIC and CHROMA_CLIENT is None:
-        db_path = os.path.join(os.path.dirname(__file__), "laws_chromadb")
-        if os.path.exists(db_path):
-            print("Connecting to ChromaDB for Legal Semantic Search...")
-            CHROMA_CLIENT = chromadb.PersistentClient(path=db_path)
-
-            # Using the same model we used to build the DB
-            sentence_transformer_ef = (
-                embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name="all-MiniLM-L6-v2"
-                )
+    global CASES_CHROMA_CLIENT, CASES_CHROMA_COLLECTION, CASE_INDEX
+    if not HAS_SEMANTIC:
+        return CHROMA_CLIENT, CHROMA_COLLECTION
+
+    # Concurrent first requests and the warmup wait here instead of loading twice
+    with _LOAD_LOCK:
+        if CHROMA_CLIENT is None and CHROMA_COLLECTION is None:
+            CHROMA_CLIENT, CHROMA_COLLECTION = _open_db(
+                "Legal",
+                "laws",
+                "indian_laws",
+                LAWS_VECTOR_STORE,
+                "build_laws_chromadb.py",
             )
-            try:
-                CHROMA_COLLECTION = CHROMA_CLIENT.get_collection(
-                    name="indian_laws", embedding_function=sentence_transformer_ef
-                )
-            except ValueError:
-                print(
-                    "ChromaDB collection 'indian_laws' not found. Please run build_laws_chromadb.py first."
-                )
-        else:
-            print(
-                f"ChromaDB path '{db_path}' not found. Please run build_laws_chromadb.py first."
-            )
-
-    global CASES_CHROMA_CLIENT, CASES_CHROMA_COLLECTION
-    if HAS_SEMANTIC and CASES_CHROMA_CLIENT is None:
-        cases_db_path = os.path.join(os.path.dirname(__file__), "cases_chromadb")
-        if os.path.exists(cases_db_path):
-            print("Connecting to ChromaDB for Cases Semantic Search...")
-            CASES_CHROMA_CLIENT = chromadb.PersistentClient(path=cases_db_path)
 
-            sentence_transformer_ef = (
-                embedding_functions.SentenceTransformerEmbeddingFunction(
-                    model_name="all-MiniLM-L6-v2"
-                )
-            )
-            try:
-                CASES_CHROMA_COLLECTION = CASES_CHROMA_CLIENT.get_collection(
-                    name="historical_cases", embedding_function=sentence_transformer_ef
-                )
-            except ValueError:
-                print(
-                    "ChromaDB collection 'historical_cases' not found. Please run build_cases_chromadb.py first."
-                )
-        else:
-            print(
-                f"ChromaDB path '{cases_db_path}' not found. Please run build_cases_chromadb.py first."
+        if CASES_CHROMA_CLIENT is None and CASES_CHROMA_COLLECTION is None:
+            CASES_CHROMA_CLIENT, CASES_CHROMA_COLLECTION = _open_db(
+                "Cases",
+                "cases",
+                "historical_cases",
+                CASES_VECTOR_STORE,
+                "build_cases_chromadb.py",
             )
+            if CASES_CHROMA_COLLECTION is not None:
+                CASE_INDEX = load_case_index()
 
     return CHROMA_CLIENT, CHROMA_COLLECTION
 
 
+def warmup():
+    """Load the model and collections, then run one encode and query against each.
+
+    Also loads the laws BM25 index. The first forward pass and the first query pay
+    one-off costs (lazy weight initialisation, kernel selection, reading the HNSW
+    index from disk); paying them
+    here keeps them off the first user request. Sets WARM when done, even if semantic
+    search is unavailable or the warmup failed (requests then load lazily as before).
+    """
+    global WARMUP_SECONDS, WARMUP_ERROR
+    start = time.perf_counter()
+    try:
+        get_law_index()
+        load_semantic_model()
+        embedding = embed_query("warmup: theft of a mobile phone at a bus stop")
+        for collection in (CHROMA_COLLECTION, CASES_CHROMA_COLLECTION):
+            if collection is not None and embedding is not None:
+                collection.query(query_embeddings=[embedding], n_results=1)
+    except Exception as e:
+        WARMUP_ERROR = str(e)
+        print(f"Retrieval warmup failed: {e}")
+    finally:
+        WARMUP_SECONDS = time.perf_counter() - start
+        WARM.set()
+        print(f"Retrieval warmup finished in {WARMUP_SECONDS:.1f}s")
+
+
+def embed_queries(texts):
+    """Embed several texts in one batched pass (None if the model is unavailable)"""
+    load_semantic_model()
+    if EMBEDDING_FUNCTION is None:
+        return None
+    keys = [normalize_query(text) for text in texts]
+    embeddings = [EMBEDDING_CACHE.get(key) for key in keys]
+    # Submitted together, the misses land in the same encoder batch
+    pending = {
+        i: EMBEDDING_BATCHER.submit(key)
+        for i, key in enumerate(keys)
+        if embeddings[i] is None
+    }
+    for i, future in pending.items():
+        embeddings[i] = _freeze(future.result())
+        EMBEDDING_CACHE.put(keys[i], embeddings[i])
+    return embeddings
+
+
+def embed_query(text):
+    """Embed one text with the same model as the vector DBs (None if unavailable)"""
+    embeddings = embed_queries([text])
+    return embeddings[0] if embeddings else None
+
+
+def max_corpus_similarity(case_description, embedding=None):
+    """Highest cosine similarity of the text to any law section or historical case.
+
+    Returns None when neither vector DB is available.
+    """
+    load_semantic_model()
+    if embedding is None:
+        embedding = embed_query(case_description)
+    if embedding is None:
+        return None
+
+    best = None
+    for collection in (CHROMA_COLLECTION, CASES_CHROMA_COLLECTION):
+        if collection is None:
+            continue
+        rows = query_collection(collection, embedding, 1, include=("distances",))
+        if rows:
+            score = 1.0 - rows[0]["distance"]
+            best = score if best is None else max(best, score)
+    return best
+
+
 def load_all_laws():
     """Stubbed out: We no longer need to manually loud laws into memory thanks to ChromaDB!"""
     pass
 
 
-def get_relevant_sections(case_description, limit=15):
-    try:
-        # Extract potential section numbers from query (e.g., "Section 379")
-        # This allows the explicit suggestions to override/boost semantic matches
-        query_sections = set(re.findall(r"\b\d+[A-Za-z]?\b", case_description))
-
-        # --- PURE SEMANTIC SEARCH USING CHROMADB ---
-        if HAS_SEMANTIC:
-            client, collection = load_semantic_model()
-            if collection:
-                # Query the Chroma Database (Returns L2 distances, lower is better)
-                results = collection.query(
-                    query_texts=[case_description],
-                    n_results=limit
-                    * 2,  # Fetch more to allow for section boosting re-ranking
+@dataclass(frozen=True)
+class SectionHit:
+    """A law section returned by a laws DB search"""
+
+    law: str
+    section: str
+    title: str
+    score: float
+    reason: str
+    description: str = ""
+    chapter: str = ""
+    id: str = ""
+
+
+@dataclass(frozen=True)
+class CaseHit:
+    """A historical case returned by a cases DB search"""
+
+    case_number: str
+    facts: str
+    sections_applied: str
+    outcome: str
+    jail_term: str
+    fine_inr: str
+    detail: str
+    score: float
+    id: str = ""
+
+
+def _section_hits(rows, limit):
+    hits = []
+    for row in rows[:limit]:
+        meta = row["metadata"]
+        # Convert Cosine distance (1 - similarity) into a similarity score
+        score = 1.0 - row["distance"]
+        hits.append(
+            SectionHit(
+                law=meta.get("law", ""),
+                section=str(meta.get("section", "")),
+                title=meta.get("title", ""),
+                score=score,
+                reason=f"Semantic Match: {score:.2f}",
+                description=meta.get("desc", ""),
+                chapter=str(meta.get("chapter", "")),
+                id=row["id"],
+            )
+        )
+    return hits
+
+
+def cited_sections(text):
+    """SectionHit for every (law, section) cited in `text` that exists in laws_json.
+
+    Resolved through the in-memory section index, without a vector query.
+    """
+    law_index = get_law_index()
+    hits = []
+    for law, number in parse_citations(text):
+        section = law_index.find(law, number)
+        if section is not None:
+            hits.append(
+                SectionHit(
+                    law=section.law,
+                    section=section.section,
+                    title=section.title,
+                    score=CITATION_SCORE,
+                    reason=f"Cited in query ({law} {number})",
+                    description=section.description,
+                    chapter=section.chapter,
                 )
+            )
+    return hits
+
+
+def _with_citations(query, hits, limit):
+    """Sections cited in the query first, then the retrieved hits not among them"""
+    cited = cited_sections(query)
+    seen = {section_key(hit.law, hit.section) for hit in cited}
+    rest = [hit for hit in hits if section_key(hit.law, hit.section) not in seen]
+    return (cited + rest)[:limit]
+
+
+def _fused_hits(rows, lexical, limit):
+    """Reciprocal-rank fusion of vector DB rows and BM25 (section, score) pairs"""
+    candidates = {}  # section key -> {"hit": fields, "vector": (rank, sim), ...}
+
+    for rank, row in enumerate(rows, 1):
+        meta = row["metadata"]
+        key = section_key(meta.get("law", ""), meta.get("section", ""))
+        if key in candidates:
+            continue
+        candidates[key] = {
+            "hit": {
+                "law": meta.get("law", ""),
+                "section": str(meta.get("section", "")),
+                "title": meta.get("title", ""),
+                "description": meta.get("desc", ""),
+                "chapter": str(meta.get("chapter", "")),
+                "id": row["id"],
+            },
+            "vector": (rank, 1.0 - row["distance"]),
+        }
+
+    for rank, (doc, bm25) in enumerate(lexical, 1):
+        section = LAW_INDEX.sections[doc]
+        candidate = candidates.setdefault(
+            section_key(section.law, section.section), {"hit": {"id": ""}}
+        )
+        # laws_json is parsed in full here, so prefer its title and text
+        candidate["hit"].update(
+            law=section.law,
+            section=section.section,
+            title=section.title,
+            description=section.description,
+            chapter=section.chapter,
+        )
+        candidate["bm25"] = (rank, bm25)
+
+    hits = []
+    for candidate in candidates.values():
+        score, reasons = 0.0, []
+        if "vector" in candidate:
+            rank, similarity = candidate["vector"]
+            score += RRF_WEIGHT_VECTOR / (RRF_K + rank)
+            reasons.append(f"Semantic #{rank} ({similarity:.2f})")
+        if "bm25" in candidate:
+            rank, bm25 = candidate["bm25"]
+            score += RRF_WEIGHT_BM25 / (RRF_K + rank)
+            reasons.append(f"BM25 #{rank} ({bm25:.1f})")
+        hits.append(
+            SectionHit(
+                score=score, reason="Hybrid: " + ", ".join(reasons), **candidate["hit"]
+            )
+        )
+
+    hits.sort(key=lambda hit: hit.score, reverse=True)
+    return hits[:limit]
+
+
+def search_sections_batch(queries, limit=15, embeddings=None):
+    """Search the laws for several queries, with one vector DB query for all of them.
+
+    Sections cited in a query ("IPC Section 378", "u/s 302 r/w 34 IPC") come first,
+    looked up directly. With HYBRID_RETRIEVAL the top `limit` vector and BM25 results
+    are fused by reciprocal rank, and BM25 alone is used when the vector DB is
+    unavailable. Returns one list of SectionHit (best first, at most `limit`) per
+    query, or None when no search is available. `embeddings` are the queries'
+    embeddings when already computed.
+    """
+    collection = load_semantic_model()[1] if HAS_SEMANTIC else None
+    if collection is None and not HYBRID_RETRIEVAL:
+        return None
+    if collection is not None and embeddings is None:
+        embeddings = embed_queries(queries)
+
+    if collection is not None:
+        row_lists = query_collection_batch(collection, embeddings, limit)
+    else:
+        row_lists = [[] for _ in queries]
+
+    results = []
+    for query, rows in zip(queries, row_lists):
+        if HYBRID_RETRIEVAL:
+            hits = _fused_hits(rows, get_law_index().search(query, limit), limit)
+        else:
+            hits = _section_hits(rows, limit)
+        results.append(_with_citations(query, hits, limit))
+    return results
+
 
-                if not results["ids"] or not results["ids"][0]:
-                    return "No relevant laws found."
+def search_sections(case_description, limit=15, embedding=None):
+    """search_sections_batch for one query: a list of SectionHit, or None"""
+    results = search_sections_batch(
+        [case_description], limit, None if embedding is None else [embedding]
+    )
+    return results[0] if results is not None else None
 
-                scored_results = []
-                for i in range(len(results["ids"][0])):
-                    dist = results["distances"][0][i]
-                    meta = results["metadatas"][0][i]
 
-                    # Convert Cosine distance (1 - similarity) into a similarity score
-                    base_score = 1.0 - dist
-                    score = base_score
+def merge_section_hits(*hit_lists, limit=15):
+    """Merge hits from several searches, keeping the best score for each section"""
+    best = {}
+    for hits in hit_lists:
+        for hit in hits or []:
+            key = section_key(hit.law, hit.section)
+            if key not in best or hit.score > best[key].score:
+                best[key] = hit
 
-                    # Generalized Boost: If section number is in query, Boost it!
-                    if str(meta.get("section", "")) in query_sections:
-                        score += 0.5  # Huge boost
-                        reasoning = f"Semantic Match + Explicit Query Boost ({meta.get('section')})"
-                    else:
-                        reasoning = f"Semantic Match: {base_score:.2f}"
+    merged = sorted(best.values(), key=lambda hit: hit.score, reverse=True)
+    return merged[:limit]
 
-                    scored_results.append(
-                        {"meta": meta, "score": score, "details": reasoning}
-                    )
 
-                # Re-sort after boosting by our custom score
-                scored_results.sort(key=lambda x: x["score"], reverse=True)
+def format_section_hits(hits):
+    """Render section hits as the plain-text context block fed to the LLM"""
+    if not hits:
+        return "No relevant laws found."
 
-                formatted_outputs = []
-                print(f"=== FETCHED RELEVANT SECTIONS (Top {limit}) ===")
-                for entry in scored_results[:limit]:
-                    meta = entry["meta"]
-                    desc = meta.get("desc", "")
-                    trunc_desc = (desc[:400] + "...") if len(desc) > 400 else desc
+    formatted_outputs = []
+    for hit in hits:
+        desc = hit.description
+        trunc_desc = (desc[:400] + "...") if len(desc) > 400 else desc
+        formatted_outputs.append(
+            f"[{hit.law}] Section {hit.section}: {hit.title}\n{trunc_desc}\n"
+            f"[Reasoning: {hit.reason} (Score: {hit.score:.2f})]"
+        )
+    return "\n\n".join(formatted_outputs)
 
-                    out_str = f"[{meta.get('law')}] Section {meta.get('section')}: {meta.get('title')}\n{trunc_desc}\n[Reasoning: {entry['details']} (Score: {entry['score']:.2f})]"
-                    formatted_outputs.append(out_str)
-                    print(out_str)
 
-                return "\n\n".join(formatted_outputs)
+def get_relevant_sections(case_description, limit=15, embedding=None):
+    try:
+        hits = search_sections(case_description, limit, embedding)
+        if hits is None:
+            return "Semantic search is disabled. Please `pip install chromadb` and build the DB."
 
-        return "Semantic search is disabled. Please `pip install chromadb` and build the DB."
+        return format_section_hits(hits)
 
     except Exception as e:
         print(f"Error querying ChromaDB: {e}")
         return ""
 
 
-def get_relevant_cases(case_description, limit=3, min_similarity=0.50):
+def _case_hits(rows, records, limit):
+    hits = []
+    seen_facts = set()
+    for row in rows:
+        if row["id"] not in records:
+            continue  # deleted since it was ranked
+        doc, meta = records[row["id"]]
+        if doc in seen_facts:
+            continue
+        seen_facts.add(doc)
+
+        hits.append(
+            CaseHit(
+                case_number=meta.get("case_number", ""),
+                facts=doc,
+                sections_applied=meta.get("sections_applied", ""),
+                outcome=meta.get("outcome", ""),
+                jail_term=meta.get("jail_term", ""),
+                fine_inr=meta.get("fine_inr", ""),
+                detail=meta.get("detail", ""),
+                # Convert Cosine distance (1 - similarity) into a similarity score
+                score=1.0 - row["distance"],
+                id=row["id"],
+            )
+        )
+        if len(hits) >= limit:
+            break
+    return hits
+
+
+def case_candidates(case_filter):
+    """Ids of the cases passing `case_filter` (see case_index.py), or None for all.
+
+    Without a case index the filter cannot be applied and every case is searched.
+    """
+    if case_filter is None:
+        return None
+    if CASE_INDEX is None:
+        print(f"No case index; searching all cases instead of {case_filter.describe()}")
+        return None
+    return CASE_INDEX.matching(case_filter)
+
+
+def _ranked_case_hits(collection, embeddings, limit, min_similarity, ids=None):
+    """CaseHit lists for `embeddings`, searching `ids` (or every case) adaptively.
+
+    Ranks CASE_CANDIDATES_INITIAL cases per query by id and distance alone, and
+    widens only the queries whose candidates were all above the threshold yet held
+    too few distinct facts. Documents and metadata are fetched by id for the
+    candidates above the threshold.
+    """
+    if ids is not None and not ids:
+        return [[] for _ in embeddings]
+    most = CASE_CANDIDATES_MAX if ids is None else min(CASE_CANDIDATES_MAX, len(ids))
+    n_results = min(max(CASE_CANDIDATES_INITIAL, limit), most)
+    hit_lists = [None] * len(embeddings)
+    pending = list(range(len(embeddings)))
+    records = {}
+    while pending:
+        # Rows below the minimum similarity threshold are already skipped
+        row_lists = query_collection_batch(
+            collection,
+            [embeddings[i] for i in pending],
+            n_results,
+            min_similarity,
+            include=("distances",),
+            ids=ids,
+        )
+        wanted = {row["id"] for rows in row_lists for row in rows} - records.keys()
+        records.update(fetch_records(collection, wanted))
+
+        widen = []
+        for i, rows in zip(pending, row_lists):
+            hit_lists[i] = _case_hits(rows, records, limit)
+            # Fewer rows than asked for means the threshold (or the end of the
+            # collection) cut the ranking short: more candidates would add nothing
+            if (
+                len(hit_lists[i]) < limit
+                and len(rows) == n_results
+                and n_results < most
+            ):
+                widen.append(i)
+            else:
+                CASE_CANDIDATES.observe(n_results)
+        pending = widen
+        n_results = min(n_results * CASE_CANDIDATES_GROWTH, most)
+    return hit_lists
+
+
+def search_cases_batch(
+    queries, limit=3, min_similarity=0.50, embeddings=None, filters=None
+):
+    """Semantic search over the cases DB for several queries with one vector query.
+
+    Returns one list of CaseHit per query (distinct facts, similarity at least
+    `min_similarity`, at most `limit`), or None when semantic search is unavailable.
+    `filters` holds a CaseFilter (or None) per query; a filtered query only searches
+    the cases its filter selects, with one vector query per distinct filter.
+    Results are cached per index version; callers must not mutate them.
+    """
+    if not HAS_SEMANTIC:
+        return None
+    load_semantic_model()  # Make sure case db is loaded
+    collection = CASES_CHROMA_COLLECTION
+    if not collection:
+        return None
+    if embeddings is None:
+        embeddings = embed_queries(queries)
+    if filters is None:
+        filters = [None] * len(queries)
+
+    version = index_version(collection)
+    keys = [
+        (collection.name, version, embedding_key(e), "cases", limit, min_similarity, f)
+        for e, f in zip(embeddings, filters)
+    ]
+    hit_lists = [RESULT_CACHE.get(key) for key in keys]
+    groups = {}  # filter -> queries to search with it
+    for i, hits in enumerate(hit_lists):
+        if hits is None:
+            groups.setdefault(filters[i], []).append(i)
+
+    for case_filter, group in groups.items():
+        found = _ranked_case_hits(
+            collection,
+            [embeddings[i] for i in group],
+            limit,
+            min_similarity,
+            case_candidates(case_filter),
+        )
+        for i, hits in zip(group, found):
+            hit_lists[i] = hits
+            RESULT_CACHE.put(keys[i], hits)
+    return hit_lists
+
+
+def search_cases(
+    case_description, limit=3, min_similarity=0.50, embedding=None, case_filter=None
+):
+    """search_cases_batch for one query: a list of CaseHit, or None"""
+    results = search_cases_batch(
+        [case_description],
+        limit,
+        min_similarity,
+        None if embedding is None else [embedding],
+        [case_filter],
+    )
+    return results[0] if results is not None else None
+
+
+def format_case_hits(hits):
+    """Render case hits as the plain-text block returned to the precedent agent"""
+    if hits is None:
+        return "Semantic search is disabled for cases. Please `pip install chromadb` and build the historical cases DB."
+    if not hits:
+        return "No relevant historical cases found matching the current case."
+
+    return "\n\n".join(
+        f"--- Historical Case Match (Similarity: {hit.score:.2f}) ---\n"
+        f"Facts: {hit.facts}\n"
+        f"Sections Applied: {hit.sections_applied}\n"
+        f"Outcome: {hit.outcome} | Jail Term: {hit.jail_term} | Fine: ₹{hit.fine_inr}\n"
+        f"Verdict Details: {hit.detail}"
+        for hit in hits
+    )
+
+
+def get_relevant_cases(case_description, limit=3, min_similarity=0.50, embedding=None):
     """Fetch relevant historical cases. Only returns cases above the min_similarity threshold."""
     try:
-        if HAS_SEMANTIC:
-            load_semantic_model()  # Make sure case db is loaded
-            if CASES_CHROMA_COLLECTION:
-                results = CASES_CHROMA_COLLECTION.query(
-                    query_texts=[case_description], n_results=100
-                )
+        hits = search_cases(case_description, limit, min_similarity, embedding)
+        if hits is not None:
+            print(
+                f"=== FETCHED HISTORICAL CASES (Top {len(hits)}, threshold={min_similarity}) ==="
+            )
+        return format_case_hits(hits)
+
+    except Exception as e:
+        print(f"Error querying Cases ChromaDB: {e}")
+        return "No relevant historical cases found."
 
-                if not results["ids"] or not results["ids"][0]:
-                    return "No relevant historical cases found."
 
-                formatted_outputs = []
-                seen_facts = set()
+# --- ASYNC WRAPPERS (used by the FastAPI endpoints) ---
 
-                for i in range(len(results["ids"][0])):
-                    doc = results["documents"][0][i]
-                    if doc in seen_facts:
-                        continue
-                    seen_facts.add(doc)
 
-                    meta = results["metadatas"][0][i]
-                    dist = results["distances"][0][i]
+async def run_in_retrieval_pool(func, *args, **kwargs):
+    """Run a blocking retrieval function on the bounded retrieval thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        RETRIEVAL_EXECUTOR, functools.partial(func, *args, **kwargs)
+    )
+
+
+async def asearch_sections(case_description, limit=15, embedding=None):
+    """Async version of search_sections. Errors are logged and yield None."""
+    try:
+        with span("retrieval", "sections"):
+            if embedding is None:
+                embedding = await aembed_query(case_description)
+            return await run_in_retrieval_pool(
+                search_sections, case_description, limit, embedding
+            )
+    except Exception as e:
+        print(f"Error querying ChromaDB: {e}")
+        return None
 
-                    # Convert Cosine distance (1 - similarity) into a similarity score
-                    score = 1.0 - dist
 
-                    # Skip results below the minimum similarity threshold
-                    if score < min_similarity:
-                        continue
+async def aembed_queries(texts):
+    """Async version of embed_queries. Errors are logged and yield None."""
+    try:
+        with span("retrieval", "embed"):
+            if EMBEDDING_FUNCTION is None:
+                # Not loaded yet (or still warming up): load off the event loop
+                await run_in_retrieval_pool(load_semantic_model)
+                if EMBEDDING_FUNCTION is None:
+                    return None
+            keys = [normalize_query(text) for text in texts]
+            embeddings = [EMBEDDING_CACHE.get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            vectors = await asyncio.gather(
+                *(EMBEDDING_BATCHER.aembed(keys[i]) for i in missing)
+            )
+            for i, vector in zip(missing, vectors):
+                embeddings[i] = _freeze(vector)
+                EMBEDDING_CACHE.put(keys[i], embeddings[i])
+            return embeddings
+    except Exception as e:
+        print(f"Error embedding queries: {e}")
+        return None
 
-                    out_str = (
-                        f"--- Historical Case Match (Similarity: {score:.2f}) ---\n"
-                        f"Facts: {doc}\n"
-                        f"Sections Applied: {meta.get('sections_applied')}\n"
-                        f"Outcome: {meta.get('outcome')} | Jail Term: {meta.get('jail_term')} | Fine: ₹{meta.get('fine_inr')}\n"
-                        f"Verdict Details: {meta.get('detail')}"
-                    )
-                    formatted_outputs.append(out_str)
 
-                    if len(formatted_outputs) >= limit:
-                        break
+async def aembed_query(text):
+    """Async version of embed_query, batched with concurrent callers.
 
-                if not formatted_outputs:
-                    print("=== NO CASES ABOVE SIMILARITY THRESHOLD ===")
-                    return (
-                        "No relevant historical cases found matching the current case."
-                    )
+    Waiting for the batch does not hold a retrieval thread. Errors are logged and
+    yield None.
+    """
+    embeddings = await aembed_queries([text])
+    return embeddings[0] if embeddings else None
 
-                print(
-                    f"=== FETCHED HISTORICAL CASES (Top {len(formatted_outputs)}, threshold={min_similarity}) ==="
-                )
-                for out in formatted_outputs:
-                    print(out)
 
-                return "\n\n".join(formatted_outputs)
+async def amax_corpus_similarity(case_description, embedding=None):
+    """Async version of max_corpus_similarity. Errors are logged and yield None."""
+    try:
+        with span("retrieval", "similarity"):
+            if embedding is None:
+                embedding = await aembed_query(case_description)
+            return await run_in_retrieval_pool(
+                max_corpus_similarity, case_description, embedding
+            )
+    except Exception as e:
+        print(f"Error querying ChromaDB: {e}")
+        return None
 
-        return "Semantic search is disabled for cases. Please `pip install chromadb` and build the historical cases DB."
 
+async def asearch_cases_batch(queries, limit=3, min_similarity=0.50, filters=None):
+    """Async version of search_cases_batch. Errors are logged and yield None."""
+    try:
+        with span("retrieval", "cases"):
+            embeddings = await aembed_queries(queries)
+            return await run_in_retrieval_pool(
+                search_cases_batch, queries, limit, min_similarity, embeddings, filters
+            )
     except Exception as e:
         print(f"Error querying Cases ChromaDB: {e}")
-        return "No relevant historical cases found."
+        return None
@@ -0,0 +1,228 @@
+import json
+import os
+import uuid
+
+import numpy as np
+
+# Rows scored per chunk when the matrix is float16 (NumPy has no fast float16
+# matmul, so chunks are widened to float32 as they are scored)
+CHUNK_ROWS = 16384
+
+# Files of a memory-mappable export (see NumpyVectorStore.export)
+EMBEDDINGS_FILE = "embeddings.npy"  # (rows, dim) normalized float32 / float16
+IDS_FILE = "ids.npy"  # (rows,) fixed-width unicode
+RECORDS_FILE = "records.jsonl"  # one {"document", "metadata"} JSON line per row
+OFFSETS_FILE = "offsets.npy"  # (rows + 1,) int64 byte offsets into RECORDS_FILE
+MANIFEST_FILE = "manifest.json"  # name, id, rows, dtype; written last
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    return vectors / np.clip(
+        np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None
+    )
+
+
+class NumpyVectorStore:
+    """Exact cosine search over an in-memory matrix of normalized embeddings.
+
+    Implements the part of ChromaDB's Collection API that retrieval uses (`name`,
+    `id`, `count()`, `query()`, `get()`), so utils.py can serve a collection from
+    either. Embeddings are one contiguous float32 or float16 matrix; ids, documents
+    and metadata are arrays indexed by row. A query batch is one matrix product
+    followed by an argpartition per query, which for a corpus of this size beats
+    walking an HNSW graph and reading metadata back from SQLite.
+    """
+
+    def __init__(self, name, embeddings, ids, documents, metadatas, id=None):
+        self.name = name
+        self.id = id or f"numpy-{name}"
+        self.matrix = np.ascontiguousarray(embeddings)
+        self.ids = np.asarray(ids)
+        self.documents = np.asarray(documents, dtype=object)
+        self.metadatas = np.asarray(metadatas, dtype=object)
+        self._row_index = None
+
+    @classmethod
+    def from_collection(cls, collection, dtype=np.float32, page_size=5000):
+        """Copy a ChromaDB collection's embeddings, documents and metadata into memory"""
+        embeddings, ids, documents, metadatas = [], [], [], []
+        for offset in range(0, collection.count(), page_size):
+            page = collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=page_size,
+                offset=offset,
+            )
+            embeddings.append(normalize(page["embeddings"]).astype(dtype))
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+        matrix = np.concatenate(embeddings) if embeddings else np.zeros((0, 0), dtype)
+        return cls(
+            collection.name, matrix, ids, documents, metadatas, id=str(collection.id)
+        )
+
+    def count(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        return self.matrix.nbytes
+
+    def similarities(self, query_embeddings, rows=None):
+        """Cosine similarity of each query to every row (or to `rows`), as float32"""
+        queries = normalize(query_embeddings)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if len(matrix) == 0:
+            # An empty store has no dimension to check the queries against
+            return np.zeros((len(queries), 0), dtype=np.float32)
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), CHUNK_ROWS):
+            chunk = matrix[start : start + CHUNK_ROWS].astype(np.float32)
+            scores[:, start : start + len(chunk)] = queries @ chunk.T
+        return scores
+
+    def top_k(self, query_embeddings, n_results, rows=None):
+        """(rows, similarities) of the `n_results` best rows per query, best first.
+
+        With `rows`, only those rows are searched.
+        """
+        scores = self.similarities(query_embeddings, rows)
+        k = min(n_results, scores.shape[1])
+        if k == 0:
+            empty = np.zeros((len(scores), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        if k < scores.shape[1]:
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            best = np.broadcast_to(np.arange(k), (len(scores), k))
+        top = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-top, axis=1, kind="stable")
+        best = np.take_along_axis(best, order, axis=1)
+        return (
+            best if rows is None else np.asarray(rows, dtype=np.int64)[best],
+            np.take_along_axis(top, order, axis=1),
+        )
+
+    def _row(self, doc_id):
+        if self._row_index is None:
+            # Built on the first lookup by id rather than at load
+            self._row_index = {d: row for row, d in enumerate(self.ids.tolist())}
+        return self._row_index.get(doc_id)
+
+    def _records(self, rows):
+        """(document, metadata) of each row"""
+        return list(zip(self.documents[rows].tolist(), self.metadatas[rows].tolist()))
+
+    def _result(self, rows, include, distances=None):
+        result = {"ids": [self.ids[r].tolist() for r in rows]}
+        if "documents" in include or "metadatas" in include:
+            records = [self._records(r) for r in rows]
+            if "documents" in include:
+                result["documents"] = [[doc for doc, _ in row] for row in records]
+            if "metadatas" in include:
+                result["metadatas"] = [[meta for _, meta in row] for row in records]
+        if distances is not None and "distances" in include:
+            result["distances"] = distances
+        return result
+
+    def query(
+        self,
+        query_embeddings,
+        n_results=10,
+        include=("documents", "metadatas", "distances"),
+        ids=None,
+    ):
+        """Same result layout as Collection.query, with cosine distances.
+
+        As with Collection.query, `ids` restricts the search to those ids.
+        """
+        rows = None if ids is None else self._rows(ids)
+        rows, similarities = self.top_k(query_embeddings, n_results, rows)
+        return self._result(rows, include, (1.0 - similarities).tolist())
+
+    def _rows(self, ids):
+        """Rows of the given ids (unknown ids skipped)"""
+        return np.array(
+            [row for row in map(self._row, ids) if row is not None], dtype=np.int64
+        )
+
+    def get(self, ids, include=("documents", "metadatas")):
+        """Same result layout as Collection.get for the given ids (unknown ids skipped)"""
+        result = self._result([self._rows(ids)], include)
+        return {key: value[0] for key, value in result.items()}
+
+    def export(self, path):
+        """Write the store as files MappedVectorStore can memory-map.
+
+        Each file is written under a temporary name and renamed into place, the
+        manifest last, so a reader never sees a partial export.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        def write(name, save):
+            tmp = os.path.join(path, f".{name}.tmp")
+            with open(tmp, "wb") as f:
+                save(f)
+            os.replace(tmp, os.path.join(path, name))
+
+        offsets = np.zeros(self.count() + 1, dtype=np.int64)
+
+        def save_records(f):
+            for row, (doc, meta) in enumerate(self._records(np.arange(self.count()))):
+                line = json.dumps({"document": doc, "metadata": meta}) + "\n"
+                offsets[row + 1] = offsets[row] + f.write(line.encode("utf-8"))
+
+        write(EMBEDDINGS_FILE, lambda f: np.save(f, self.matrix))
+        write(IDS_FILE, lambda f: np.save(f, self.ids))
+        write(RECORDS_FILE, save_records)
+        write(OFFSETS_FILE, lambda f: np.save(f, offsets))
+        manifest = {
+            "name": self.name,
+            "id": f"{self.id}:{uuid.uuid4().hex[:8]}",
+            "rows": self.count(),
+            "dtype": str(self.matrix.dtype),
+        }
+        write(MANIFEST_FILE, lambda f: f.write(json.dumps(manifest).encode("utf-8")))
+
+
+class MappedVectorStore(NumpyVectorStore):
+    """NumpyVectorStore over a memory-mapped export, shared by every process.
+
+    The embedding matrix, ids and record offsets are read-only memory maps, so all
+    uvicorn workers search the same physical pages in the OS page cache instead of
+    each holding a copy, and opening is near-instant. Documents and metadata are
+    decoded from the records file only for the rows a query returns.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.path = path
+        self.name = manifest["name"]
+        self.id = manifest["id"]
+        self._row_index = None
+        if manifest["rows"] == 0:
+            # np.memmap cannot map an empty file; an empty export just finds nothing
+            self.matrix = np.zeros((0, 0), dtype=manifest["dtype"])
+            self.ids = np.zeros(0, dtype=str)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.records = np.zeros(0, dtype=np.uint8)
+            return
+        self.matrix = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+        self.ids = np.load(os.path.join(path, IDS_FILE), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        self.records = np.memmap(
+            os.path.join(path, RECORDS_FILE), dtype=np.uint8, mode="r"
+        )
+
+    def _records(self, rows):
+        records = []
+        for row in np.asarray(rows).tolist():
+            start, end = self.offsets[row], self.offsets[row + 1]
+            record = json.loads(self.records[start:end].tobytes())
+            records.append((record["document"], record["metadata"]))
+        return records
@@ -8,8 +8,45 @@ import ChargeSheetDisplay from "./components/ChargeSheetDisplay";
 import VerdictDisplay from "./components/VerdictDisplay";
 import FairnessPanel from "./components/FairnessPanel";
 
+// POSTs to a streaming endpoint and calls onEvent(event, data) for each Server-Sent Event
+const streamSSE = async (url, payload, onEvent) => {
+    const response = await fetch(url, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(payload),
+    });
+    if (!response.ok) throw new Error(`Request failed: ${response.status}`);
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            for (const line of frame.split("\n")) {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            }
+            const parsed = JSON.parse(data);
+            if (event === "error") throw new Error(parsed.detail);
+            onEvent(event, parsed);
+        }
+    }
+};
+
 function App() {
     const [firText, setFirText] = useState("");
+    // Server-side case session opened by the FIR stage (see backend/sessions.py)
+    const [caseId, setCaseId] = useState(null);
 
     const [formData, setFormData] = useState(null); // Store form data for sequential steps
 
@@ -39,6 +76,7 @@ function App() {
         setQuestionnaire(null);
         setChargeSheet(null);
         setVerdict(null);
+        setCaseId(null);
         setFormData(data);
         setActiveStep(1);
 
@@ -62,11 +100,21 @@ function App() {
                 officer_rank: data.officerRank || "Not provided",
             };
 
-            const response = await axios.post(
-                "http://127.0.0.1:8000/api/generate_fir",
+            // Stream the FIR so the draft appears as soon as the model starts writing
+            let streamed = "";
+            await streamSSE(
+                "http://127.0.0.1:8000/api/generate_fir/stream",
                 payload,
+                (event, data) => {
+                    if (event === "token") {
+                        streamed += data.text;
+                        setFirText(streamed);
+                    } else if (event === "done") {
+                        setFirText(data.fir);
+                        setCaseId(data.case_id);
+                    }
+                },
             );
-            setFirText(response.data.fir);
         } catch (err) {
             console.error(err);
             setError(
@@ -77,6 +125,10 @@ function App() {
         }
     };
 
+    // Later stages send the case_id instead of re-uploading the FIR / charge sheet;
+    // the full text is only sent when there is no session to refer to
+    const caseFields = (fields) => (caseId ? { case_id: caseId } : fields);
+
     const handleGenerateQuestionnaire = async () => {
         if (!firText || !formData) return;
         setLoading(true);
@@ -85,10 +137,10 @@ function App() {
         try {
             const response = await axios.post(
                 "http://127.0.0.1:8000/api/generate_questionnaire",
-                {
+                caseFields({
                     fir_content: firText,
                     case_description: formData.caseDescription,
-                },
+                }),
             );
             setQuestionnaire(response.data);
             setActiveStep(2);
@@ -108,22 +160,33 @@ function App() {
 
         try {
             const payload = {
-                fir_content: firText,
-                case_description: formData.caseDescription,
+                ...caseFields({
+                    fir_content: firText,
+                    case_description: formData.caseDescription,
+                    officer_name: formData.officerName || "Not provided",
+                    officer_rank: formData.officerRank || "Not provided",
+                    police_station: formData.policeStation || "Not provided",
+                }),
                 plaintiff_answers: pAnswers,
                 defendant_answers: dAnswers,
                 investigation_summary: summary || "",
-                officer_name: formData.officerName || "Not provided",
-                officer_rank: formData.officerRank || "Not provided",
-                police_station: formData.policeStation || "Not provided",
             };
 
-            const response = await axios.post(
-                "http://127.0.0.1:8000/api/generate_charge_sheet",
+            let streamed = "";
+            await streamSSE(
+                "http://127.0.0.1:8000/api/generate_charge_sheet/stream",
                 payload,
+                (event, data) => {
+                    if (event === "token") {
+                        streamed += data.text;
+                        setChargeSheet(streamed);
+                        setActiveStep(3);
+                    } else if (event === "done") {
+                        setChargeSheet(data.charge_sheet);
+                        setActiveStep(3);
+                    }
+                },
             );
-            setChargeSheet(response.data.charge_sheet);
-            setActiveStep(3);
         } catch (err) {
             console.error(err);
             setError("Failed to generate Charge Sheet.");
@@ -141,10 +204,10 @@ function App() {
         try {
             const response = await axios.post(
                 "http://127.0.0.1:8000/api/predict_verdict",
-                {
+                caseFields({
                     charge_sheet_content: chargeSheet,
                     case_description: formData.caseDescription,
-                },
+                }),
             );
             const verdictData = response.data;
             setVerdict(verdictData);
@@ -155,7 +218,7 @@ function App() {
             try {
                 const fairnessResponse = await axios.post(
                     "http://127.0.0.1:8000/api/analyze_fairness",
-                    {
+                    caseFields({
                         charge_sheet_content: chargeSheet,
                         case_description: formData.caseDescription,
                         original_verdict: verdictData.verdict || "Guilty",
@@ -163,7 +226,7 @@ function App() {
                         defendant_answers: lastAnswers.d,
                         accused_name:
                             formData.accusedName || "Unknown person(s)",
-                    },
+                    }),
                 );
                 setFairnessReport(fairnessResponse.data);
             } catch (fairErr) {